@@ -0,0 +1,126 @@
+# Prepara os arquivos estáticos servidos pelo app em /app/static (ver
+# .streamlit/config.toml): baixa uma vez as fontes do tema, gera o CSS das
+# fontes presentes e o logo já no tamanho exibido. Rodar uma vez por
+# deploy, com acesso à internet (sem ela, só o logo e o CSS são gerados):
+#
+#   python -m assets
+import argparse
+import hashlib
+import re
+import sys
+import urllib.request
+from pathlib import Path
+
+STATIC_DIR = Path(__file__).resolve().parent / 'static'
+FONTS_DIR = STATIC_DIR / 'fonts'
+THEME_FILE = STATIC_DIR / 'theme.css'
+FONTS_CSS = STATIC_DIR / 'fonts.css'
+LOGO_SOURCE = Path(__file__).resolve().parent / '1.png'
+LOGO_FILE = STATIC_DIR / 'logo.png'
+
+# Largura do logo na página; o arquivo tem o dobro para telas de alta densidade
+LOGO_WIDTH = 180
+
+FONTS = {'Poppins': [400, 600, 700], 'Yrsa': [400, 600]}
+FONTS_CSS_URL = 'https://fonts.googleapis.com/css2?family={family}:wght@{weight}&display=swap'
+# O Google Fonts só entrega woff2 para navegadores que o suportam
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+SUBSET = 'latin'
+
+FONT_FACE = """@font-face {{
+    font-family: '{family}';
+    font-style: normal;
+    font-weight: {weight};
+    font-display: swap;
+    src: url('fonts/{arquivo}') format('woff2');
+}}
+"""
+
+
+# URL da rota de arquivos estáticos com a versão do conteúdo, para o
+# navegador manter o arquivo em cache até ele mudar
+def static_url(nome):
+    caminho = STATIC_DIR / nome
+    try:
+        versao = hashlib.sha256(caminho.read_bytes()).hexdigest()[:12]
+    except OSError:
+        return f'app/static/{nome}'
+    return f'app/static/{nome}?v={versao}'
+
+
+# Tags <link> do tema. O CSS das fontes só entra quando existe: sem os
+# arquivos, a página usa as fontes do sistema, sem requisições que dão 404.
+def theme_links():
+    nomes = ['fonts.css', 'theme.css'] if FONTS_CSS.exists() else ['theme.css']
+    return ''.join(f'<link rel="stylesheet" href="{static_url(nome)}">' for nome in nomes)
+
+
+def font_file(family, weight):
+    return FONTS_DIR / f'{family.lower()}-{weight}.woff2'
+
+
+# Gera fonts.css com um @font-face para cada arquivo presente em fonts/
+def gerar_css_fontes():
+    regras = [
+        FONT_FACE.format(family=family, weight=weight, arquivo=font_file(family, weight).name)
+        for family, pesos in FONTS.items()
+        for weight in pesos
+        if font_file(family, weight).exists()
+    ]
+    if not regras:
+        FONTS_CSS.unlink(missing_ok=True)
+        return
+    FONTS_CSS.write_text('/* Gerado por `python -m assets` */\n' + ''.join(regras), encoding='utf-8')
+    print(f'{FONTS_CSS.relative_to(STATIC_DIR)}: {len(regras)} fontes', file=sys.stderr)
+
+
+def _get(url):
+    req = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        return resp.read()
+
+
+# Baixa o subconjunto latino (inclui os acentos do português) de cada peso
+def baixar_fontes(force=False):
+    FONTS_DIR.mkdir(parents=True, exist_ok=True)
+    for family, pesos in FONTS.items():
+        for weight in pesos:
+            destino = font_file(family, weight)
+            if destino.exists() and not force:
+                continue
+            css = _get(FONTS_CSS_URL.format(family=family, weight=weight)).decode('utf-8')
+            blocos = dict(re.findall(r'/\* ([\w-]+) \*/\s*@font-face\s*{([^}]*)}', css))
+            url = re.search(r'url\((\S+?)\)', blocos.get(SUBSET, css))
+            if not url:
+                raise RuntimeError(f'Fonte {family} {weight} não encontrada na resposta do Google Fonts')
+            destino.write_bytes(_get(url.group(1)))
+            print(f'{destino.relative_to(STATIC_DIR)}: {destino.stat().st_size / 1024:.0f} KiB', file=sys.stderr)
+
+
+# Reduz o logo original para 2x a largura exibida e recomprime
+def gerar_logo():
+    from PIL import Image
+
+    with Image.open(LOGO_SOURCE) as img:
+        largura = LOGO_WIDTH * 2
+        altura = round(img.height * largura / img.width)
+        img.resize((largura, altura), Image.LANCZOS).save(LOGO_FILE, optimize=True)
+    print(f'{LOGO_FILE.relative_to(STATIC_DIR)}: {LOGO_FILE.stat().st_size / 1024:.0f} KiB', file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gera os arquivos estáticos do tema (fontes e logo)')
+    parser.add_argument('--force', action='store_true', help='baixa as fontes de novo')
+    parser.add_argument('--skip-fonts', action='store_true', help='só gera o logo')
+    args = parser.parse_args(argv)
+
+    gerar_logo()
+    try:
+        if not args.skip_fonts:
+            baixar_fontes(force=args.force)
+    finally:
+        gerar_css_fontes()
+
+
+if __name__ == '__main__':
+    main()
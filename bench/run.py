@@ -0,0 +1,203 @@
+# Benchmark dos dashboards com planilhas sintéticas.
+#
+#   python -m bench.run                      # escalas padrão
+#   python -m bench.run --preset full        # até 100k perguntas / 300 Ceasas
+#   python -m bench.run --scale 5000,40 --out resultados.json
+#
+# Cada escala roda em um processo separado (caches frios) e o resultado de
+# todas as etapas vai para um arquivo JSON, para comparar execuções.
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# (perguntas, Ceasas); a matriz atual tem 118 perguntas e 7 blocos
+PRESETS = {
+    'quick': [(118, 7)],
+    'default': [(118, 7), (1180, 7), (11800, 7), (1180, 70)],
+    'full': [(118, 7), (1180, 7), (11800, 7), (1180, 70), (100000, 7), (11800, 300)],
+}
+
+SITE_CEASA = 'CEAGESP/SP'
+SITE_SCRIPT = 'dashboard_CEAGESP-SP.py'
+
+
+def medir(fn, repeticoes):
+    tempos = []
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = fn()
+        tempos.append(time.perf_counter() - inicio)
+    return resultado, {'min_s': min(tempos), 'median_s': statistics.median(tempos), 'runs': len(tempos)}
+
+
+# Pico de memória alocada pelo Python (tracemalloc) durante uma execução, em MB
+def pico_mb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+# Executado no processo filho: mede cada etapa para uma escala
+def worker(n_perguntas, n_ceasas, repeticoes):
+    import pyarrow as pa
+    from streamlit.testing.v1 import AppTest
+
+    from config import COLS_ID, COL_DIMENSAO, COL_SUBDIMENSAO, GLOBAL_FILE, PONTOS, data_path
+    from cube import build_cube, chart_data, kpis, soma_por_ceasa
+    from filters import FilterIndex, select
+    from loader import load_workbook, read_workbook
+    from scoring import recompute
+    from views import fig_comparativo, fig_subdimensao
+
+    path = data_path(GLOBAL_FILE)
+    etapas = {}
+    grande = n_perguntas * n_ceasas > 500_000
+    rep_xlsx = 1 if grande else repeticoes
+
+    df, etapas['xlsx_load_stream'] = medir(lambda: read_workbook(path, reader='stream'), rep_xlsx)
+    _, etapas['xlsx_load_pandas'] = medir(lambda: read_workbook(path, reader='pandas'), rep_xlsx)
+    for leitor in ['stream', 'pandas']:
+        etapas[f'xlsx_load_{leitor}']['peak_mb'] = pico_mb(lambda: read_workbook(path, reader=leitor))
+    load_workbook(path)
+    _, etapas['snapshot_load'] = medir(lambda: load_workbook(path), repeticoes)
+
+    ceasa = df.columns[4][0]
+    cols_tabela = COLS_ID + [col for col in df.columns if col[0] == ceasa]
+    indice, etapas['filter_index_build'] = medir(lambda: FilterIndex(df), repeticoes)
+    dims = indice.values(COL_DIMENSAO)[:1]
+    subdims = indice.values(COL_SUBDIMENSAO)[:2]
+    selecao = {COL_DIMENSAO: dims, COL_SUBDIMENSAO: subdims}
+    linhas, etapas['filter'] = medir(lambda: indice.positions(selecao), repeticoes)
+    tabela, etapas['filter_select_table'] = medir(lambda: select(df, linhas, cols_tabela), repeticoes)
+
+    cube, etapas['cube_build'] = medir(lambda: build_cube(df), repeticoes)
+    _, etapas['recompute_metrics'] = medir(lambda: recompute(df), repeticoes)
+    _, etapas['kpi'] = medir(lambda: kpis(cube, ceasa, dims, subdims), repeticoes)
+    somas, etapas['kpi_comparativo'] = medir(lambda: soma_por_ceasa(cube, PONTOS), repeticoes)
+
+    _, etapas['chart_data'] = medir(lambda: chart_data(cube, ceasa, dims, subdims), repeticoes)
+    _, etapas['figure_subdimensao'] = medir(lambda: fig_subdimensao(chart_data(cube, ceasa), ceasa), repeticoes)
+    _, etapas['figure_comparativo'] = medir(lambda: fig_comparativo(somas), repeticoes)
+
+    def serializar(tabela):
+        sink = pa.BufferOutputStream()
+        t = pa.Table.from_pandas(tabela)
+        with pa.ipc.new_stream(sink, t.schema) as writer:
+            writer.write_table(t)
+        return sink.getvalue().size
+
+    tabela_completa = select(df, None, cols_tabela)
+    _, etapas['table_serialize'] = medir(lambda: serializar(tabela_completa), repeticoes)
+
+    # Reruns completos pelo harness headless do Streamlit
+    def rerun(script, query=None):
+        at = AppTest.from_file(str(ROOT / script), default_timeout=600)
+        for chave, valor in (query or {}).items():
+            at.query_params[chave] = valor
+        at.run()
+        if at.exception:
+            raise RuntimeError(f'{script}: {at.exception[0].message}')
+        return at
+
+    _, etapas['rerun_dashboard_first'] = medir(lambda: rerun('dashboard.py'), 1)
+    _, etapas['rerun_dashboard_warm'] = medir(lambda: rerun('dashboard.py'), repeticoes)
+    _, etapas['rerun_site_first'] = medir(lambda: rerun(SITE_SCRIPT), 1)
+    _, etapas['rerun_site_warm'] = medir(lambda: rerun(SITE_SCRIPT), repeticoes)
+
+    return {
+        'questions': n_perguntas,
+        'ceasas': n_ceasas,
+        'columns': len(df.columns),
+        'rows': len(df),
+        'xlsx_bytes': os.path.getsize(path),
+        'stages': etapas,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+# Gera as planilhas de uma escala e mede em um processo filho
+def rodar_escala(n_perguntas, n_ceasas, repeticoes):
+    from bench.synthetic import gerar_planilha, nomes_ceasas
+    from config import CEASAS, GLOBAL_FILE
+
+    with tempfile.TemporaryDirectory(prefix='dash-bench-') as tmp:
+        inicio = time.perf_counter()
+        gerar_planilha(Path(tmp) / GLOBAL_FILE, n_perguntas, nomes_ceasas(n_ceasas))
+        gerar_planilha(Path(tmp) / CEASAS[SITE_CEASA], n_perguntas, [SITE_CEASA], seed=1)
+        geracao = time.perf_counter() - inicio
+        # O comparativo lê a planilha consolidada gerada acima (com `merge` ele
+        # juntaria só a planilha do Ceasa do site). Plano de dados e log de
+        # spans também ficam no diretório temporário: as cópias Arrow de cada
+        # escala não sobram em /dev/shm.
+        env = dict(os.environ, DASH_DATA_DIR=tmp, DASH_SNAPSHOT_DIR=str(Path(tmp) / '.snapshots'),
+                   DASH_GLOBAL_SOURCE='file', DASH_PLANE_DIR=str(Path(tmp) / 'plane'),
+                   DASH_TRACE_LOG=str(Path(tmp) / 'spans.jsonl'))
+        proc = subprocess.run(
+            [sys.executable, '-m', 'bench.run', '--worker', f'{n_perguntas},{n_ceasas}', '--repeat', str(repeticoes)],
+            cwd=ROOT, env=env, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            return {'questions': n_perguntas, 'ceasas': n_ceasas, 'error': proc.stderr.strip().splitlines()[-1:]}
+        resultado = json.loads(proc.stdout.strip().splitlines()[-1])
+        resultado['generate_s'] = geracao
+        return resultado
+
+
+def _escala(texto):
+    perguntas, ceasas = texto.split(',')
+    return int(perguntas), int(ceasas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark dos dashboards com planilhas sintéticas')
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='default')
+    parser.add_argument('--scale', type=_escala, action='append', help='perguntas,ceasas (pode repetir)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--out', default='bench_results.json')
+    parser.add_argument('--worker', type=_escala, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(worker(*args.worker, args.repeat)))
+        return
+
+    escalas = args.scale or PRESETS[args.preset]
+    resultados = []
+    for n_perguntas, n_ceasas in escalas:
+        print(f'{n_perguntas} perguntas x {n_ceasas} Ceasas...', file=sys.stderr)
+        resultados.append(rodar_escala(n_perguntas, n_ceasas, args.repeat))
+    saida = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'repeat': args.repeat,
+        'results': resultados,
+    }
+    Path(args.out).write_text(json.dumps(saida, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f'Resultados em {args.out}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
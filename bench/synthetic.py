@@ -0,0 +1,82 @@
+import numpy as np
+from openpyxl import Workbook
+
+from config import CEASAS, PCT_DIM, PCT_SUBDIM, PONTOS, RESULTADO, SOMA_PTS
+
+# Blocos de cada Ceasa, na mesma ordem das planilhas reais
+BLOCO = ['Respostas', PONTOS, SOMA_PTS, PCT_SUBDIM, PCT_DIM, RESULTADO]
+PONTOS_MAX = 2
+PERGUNTAS_POR_SUBDIM = 15
+SUBDIMS_POR_DIM = 4
+
+
+# Nomes dos Ceasas sintéticos: os cadastrados primeiro (para que as
+# páginas reais encontrem seus blocos) e depois 'Ceasa 0007/BR', ...
+def nomes_ceasas(n):
+    nomes = list(CEASAS)[:n]
+    nomes += [f'Ceasa {i:04d}/BR' for i in range(len(nomes) + 1, n + 1)]
+    return nomes
+
+
+# Hierarquia Dimensão/Subdimensão de n perguntas
+def hierarquia(n_perguntas):
+    subdim = np.arange(n_perguntas) // PERGUNTAS_POR_SUBDIM
+    dim = subdim // SUBDIMS_POR_DIM
+    return dim, subdim
+
+
+# Gera uma planilha no formato Matriz_Avaliativa: cabeçalho em duas linhas
+# (Ceasa, métrica), Dimensão/Subdimensão só na primeira linha de cada bloco
+# e as métricas derivadas calculadas como nas fórmulas do Excel
+def gerar_planilha(path, n_perguntas, ceasas, seed=0):
+    rng = np.random.default_rng(seed)
+    dim, subdim = hierarquia(n_perguntas)
+    inicio_subdim = np.r_[True, subdim[1:] != subdim[:-1]]
+    inicio_dim = np.r_[True, dim[1:] != dim[:-1]]
+    n_subdim = subdim.max() + 1
+    n_dim = dim.max() + 1
+    max_subdim = np.bincount(subdim) * PONTOS_MAX
+    max_dim = np.bincount(dim) * PONTOS_MAX
+
+    colunas = []
+    for ceasa in ceasas:
+        pontos = rng.choice([0, 1, 2], size=n_perguntas, p=[0.35, 0.15, 0.5])
+        soma_subdim = np.bincount(subdim, weights=pontos, minlength=n_subdim)
+        soma_dim = np.bincount(dim, weights=pontos, minlength=n_dim)
+        colunas.append((
+            np.where(pontos > 0, 'SIM', 'NÃO'),
+            pontos,
+            soma_subdim[subdim],
+            soma_subdim[subdim] / max_subdim[subdim],
+            soma_dim[dim] / max_dim[dim],
+            pontos.sum() / (n_perguntas * PONTOS_MAX),
+        ))
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Perguntas')
+    topo = ['Dimensão', 'Subdimensão', 'Nº', 'Perguntas']
+    base = [None] * 4
+    for ceasa in ceasas:
+        topo += [ceasa] + [None] * (len(BLOCO) - 1)
+        base += BLOCO
+    ws.append(topo)
+    ws.append(base)
+    for i in range(n_perguntas):
+        linha = [
+            f'Dimensão {dim[i] + 1}' if inicio_dim[i] else None,
+            f'Subdimensão {subdim[i] + 1}' if inicio_subdim[i] else None,
+            i + 1,
+            f'Pergunta sintética {i + 1}?',
+        ]
+        for respostas, pontos, soma, pct_sub, pct_dim, resultado in colunas:
+            linha += [
+                respostas[i],
+                int(pontos[i]),
+                float(soma[i]) if inicio_subdim[i] else None,
+                float(pct_sub[i]) if inicio_subdim[i] else None,
+                float(pct_dim[i]) if inicio_dim[i] else None,
+                float(resultado) if i == 0 else None,
+            ]
+        ws.append(linha)
+    wb.save(path)
+    return path
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from config import AGGREGATE_BLOCKS, COLS_ID
+
+# Texto vira categoria quando há no máximo esta fração de valores distintos
+CATEGORY_RATIO = 0.5
+
+
+def _bytes(df):
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+# Colunas que nenhuma visão usa: blocos de totais da planilha (ex.: GLOBAL)
+# e colunas sem nome e sem nenhum valor
+def _colunas_usadas(df):
+    usadas = []
+    for col in df.columns:
+        if col in COLS_ID:
+            usadas.append(col)
+        elif str(col[0]).strip().upper() in AGGREGATE_BLOCKS:
+            continue
+        elif str(col[1]).startswith('Unnamed') and df[col].isna().all():
+            continue
+        else:
+            usadas.append(col)
+    return usadas
+
+
+def _compactar(serie):
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie
+    if pd.api.types.is_bool_dtype(serie):
+        return serie
+    if pd.api.types.is_integer_dtype(serie):
+        return pd.to_numeric(serie, downcast='integer')
+    if pd.api.types.is_float_dtype(serie):
+        return serie.astype(np.float32)
+    validos = serie.dropna()
+    if len(validos) and validos.map(type).eq(str).all() and validos.nunique() <= CATEGORY_RATIO * len(serie):
+        # Categorias na ordem em que aparecem (filtros e gráficos seguem a planilha)
+        return serie.astype(pd.CategoricalDtype(validos.unique()))
+    return serie
+
+
+# Normaliza o frame carregado: descarta colunas sem uso, textos repetidos
+# viram categorias e métricas vão para float32/inteiros menores. Retorna o
+# frame e o uso de memória (memory_usage(deep=True)) antes e depois.
+def normalize(df):
+    antes = _bytes(df)
+    usadas = _colunas_usadas(df)
+    compacto = pd.DataFrame(
+        {col: _compactar(df[col]) for col in usadas}, index=df.index
+    )
+    compacto.columns = pd.MultiIndex.from_tuples(usadas) if isinstance(df.columns, pd.MultiIndex) else usadas
+    relatorio = {
+        'bytes_before': antes,
+        'bytes_after': _bytes(compacto),
+        'columns_before': df.shape[1],
+        'columns_after': compacto.shape[1],
+    }
+    return compacto, relatorio
@@ -0,0 +1,71 @@
+# Configuração compartilhada pelos dashboards
+import os
+import unicodedata
+from pathlib import Path
+
+# Paleta de cores personalizada
+COLOR_PRIMARY = '#2F473F'
+COLOR_SECONDARY = '#69C655'
+COLOR_ACCENT = '#CC4A23'
+COLOR_LIST = [COLOR_PRIMARY, COLOR_SECONDARY, COLOR_ACCENT]
+# Barras agregadas ('Outros' no comparativo)
+COLOR_MUTED = '#A3AFA9'
+
+# Diretório das planilhas (padrão: diretório de execução, como antes)
+DATA_DIR = Path(os.environ.get('DASH_DATA_DIR', '.'))
+
+# Planilha consolidada (visão comparativa)
+GLOBAL_FILE = 'Matriz_Avaliativa_Ceasas-Dashboard.xlsx'
+
+# Planilhas consolidadas à mão; a visão comparativa pode montar o mesmo
+# frame a partir das planilhas por Ceasa (ver ingest.py)
+CONSOLIDATED_FILES = [GLOBAL_FILE, 'Matriz_Avaliativa_GERAL.xlsx']
+
+# Fonte da visão comparativa: 'merge' (junta as planilhas por Ceasa de
+# DATA_DIR) ou 'file' (lê GLOBAL_FILE)
+GLOBAL_SOURCE = os.environ.get('DASH_GLOBAL_SOURCE', 'merge')
+
+# Comparativo: quantos Ceasas (as maiores somas) têm barra própria no
+# gráfico; os demais somam em uma barra 'Outros'
+TOP_CEASAS = int(os.environ.get('DASH_TOP_CEASAS', '20'))
+
+# Ceasas atendidas: nome (nível 0 do cabeçalho) -> planilha do Ceasa.
+# Para incluir um novo Ceasa basta acrescentar uma linha aqui.
+CEASAS = {
+    'Belem/PA': 'Matriz_Avaliativa_Belem-PA.xlsx',
+    'São Luís/MA': 'Matriz_Avaliativa_São-Luis-MA.xlsx',
+    'CEAGESP/SP': 'Matriz_Avaliativa_CEAGESP-SP.xlsx',
+    'Mais Nutrição/CE': 'Matriz_Avaliativa_Mais-Nutrição-CE.xlsx',
+    'PRODAL/MG': 'Matriz_Avaliativa_PRODAL-MG.xlsx',
+    'Curitiba/PR': 'Matriz_Avaliativa_Curitiba-PR.xlsx',
+}
+
+
+# Caminho de uma planilha dentro de DATA_DIR
+def data_path(nome):
+    return str(DATA_DIR / nome)
+
+
+# Colunas de identificação (multi-index gerado pelo header=[0,1])
+COL_DIMENSAO = ('Dimensão', 'Unnamed: 0_level_1')
+COL_SUBDIMENSAO = ('Subdimensão', 'Unnamed: 1_level_1')
+COL_NUMERO = ('Nº', 'Unnamed: 2_level_1')
+COL_PERGUNTA = ('Perguntas', 'Unnamed: 3_level_1')
+COLS_ID = [COL_DIMENSAO, COL_SUBDIMENSAO, COL_NUMERO, COL_PERGUNTA]
+
+# Métricas de cada bloco de Ceasa
+PONTOS = 'Pontos'
+SOMA_PTS = 'Soma (pts)'
+PCT_SUBDIM = '% da Subdimensão'
+PCT_DIM = '% Total da Dimensão'
+RESULTADO = 'Resultado da Matriz'
+
+# Blocos de totais da planilha consolidada que não são um Ceasa (nenhuma
+# visão usa; são descartados na carga)
+AGGREGATE_BLOCKS = ['GLOBAL']
+
+
+# Nome de um Ceasa para uso em caminhos e nomes de arquivo (ex.: 'Sao-Luis-MA')
+def slug(nome):
+    ascii_ = unicodedata.normalize('NFKD', nome).encode('ascii', 'ignore').decode('ascii')
+    return '-'.join(ascii_.replace('/', ' ').split())
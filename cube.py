@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+from config import PONTOS, PCT_DIM, PCT_SUBDIM, RESULTADO, SOMA_PTS
+from tidy import METRICAS, QuestionMatrix
+
+
+# Cubo de agregados por (Ceasa, Dimensão, Subdimensão): soma, contagem e
+# média de cada métrica, além do número de perguntas de cada célula.
+# É montado uma vez por versão dos dados; os KPIs e o comparativo são
+# respondidos somando células, sem percorrer as perguntas a cada rerun.
+# Cada métrica é agregada para todos os Ceasas de uma vez a partir da
+# matriz pergunta × Ceasa.
+def build_cube(df, matriz=None):
+    matriz = matriz if matriz is not None else QuestionMatrix(df)
+    if not matriz.ceasas:
+        return pd.DataFrame()
+    chaves = pd.DataFrame({'dimensao': matriz.dimensao, 'subdimensao': matriz.subdimensao})
+    agrupado = chaves.groupby(['dimensao', 'subdimensao'], dropna=False, sort=False, observed=True)
+    grupos = agrupado.ngroup().to_numpy()
+    perguntas = agrupado.size()
+    k = len(matriz.ceasas)
+
+    colunas = {}
+    for metrica, valores in matriz.values.items():
+        somas = pd.DataFrame(np.nan_to_num(valores)).groupby(grupos).sum().to_numpy(dtype=np.float64, copy=True)
+        contagens = pd.DataFrame(~np.isnan(valores)).groupby(grupos).sum().to_numpy(dtype=np.float64, copy=True)
+        # Ceasa sem a coluna da métrica: célula vazia, não zero
+        somas[:, ~matriz.present[metrica]] = np.nan
+        contagens[:, ~matriz.present[metrica]] = np.nan
+        # Linhas na ordem (Ceasa, grupo)
+        colunas[(metrica, 'sum')] = somas.T.ravel()
+        colunas[(metrica, 'count')] = contagens.T.ravel()
+    colunas[('perguntas', '')] = np.tile(perguntas.to_numpy(), k)
+    index = pd.MultiIndex.from_tuples(
+        [(ceasa,) + chave for ceasa in matriz.ceasas for chave in perguntas.index],
+        names=['ceasa', 'dimensao', 'subdimensao'],
+    )
+    cube = pd.DataFrame(colunas, index=index)
+    for metrica in METRICAS:
+        if (metrica, 'sum') in cube.columns:
+            cube[(metrica, 'mean')] = cube[(metrica, 'sum')] / cube[(metrica, 'count')].replace(0, np.nan)
+    return cube
+
+
+# Células do cubo de um Ceasa restritas às Dimensões/Subdimensões filtradas
+def _celulas(cube, ceasa, filtro_dim=None, filtro_subdim=None):
+    if cube.empty or ceasa not in cube.index.get_level_values('ceasa'):
+        return None
+    celulas = cube.xs(ceasa, level='ceasa')
+    if filtro_dim:
+        celulas = celulas[celulas.index.get_level_values('dimensao').isin(filtro_dim)]
+    if filtro_subdim:
+        celulas = celulas[celulas.index.get_level_values('subdimensao').isin(filtro_subdim)]
+    return celulas
+
+
+# KPIs de um Ceasa para os filtros escolhidos. Métricas ausentes no bloco
+# do Ceasa valem 0, como nos cards originais.
+def kpis(cube, ceasa, filtro_dim=None, filtro_subdim=None):
+    celulas = _celulas(cube, ceasa, filtro_dim, filtro_subdim)
+    resultado = {'total_perguntas': 0, 'soma_pontos': 0, 'media_subdim': 0, 'media_dim': 0, 'media_result': 0}
+    if celulas is None:
+        return resultado
+    resultado['total_perguntas'] = int(celulas[('perguntas', '')].sum())
+
+    def media(metrica):
+        if (metrica, 'sum') not in celulas.columns:
+            return 0
+        if len(celulas) and celulas[(metrica, 'count')].isna().all():
+            # Métrica existe na planilha, mas não no bloco deste Ceasa
+            return 0
+        n = celulas[(metrica, 'count')].sum()
+        return celulas[(metrica, 'sum')].sum() / n if n else np.nan
+
+    if (PONTOS, 'sum') in celulas.columns:
+        resultado['soma_pontos'] = celulas[(PONTOS, 'sum')].sum()
+    resultado['media_subdim'] = media(PCT_SUBDIM)
+    resultado['media_dim'] = media(PCT_DIM)
+    resultado['media_result'] = media(RESULTADO)
+    return resultado
+
+
+# Agrupa as células (Dimensão, Subdimensão) de um Ceasa por `por`
+# ('subdimensao' ou 'dimensao'), na ordem da planilha: uma linha por barra
+# do gráfico, com a soma dos pontos e o número de perguntas. Grupos sem
+# nenhum valor de 'Soma (pts)' ficam de fora, como antes.
+def chart_groups(celulas, por='subdimensao'):
+    colunas = ['grupo', 'dimensao', 'soma', 'perguntas']
+    celulas = celulas[celulas[por].notna()]
+    if celulas.empty:
+        return pd.DataFrame(columns=colunas)
+    agrupado = celulas.groupby(por, sort=False, observed=True).agg(
+        primeira=('dimensao', 'first'), soma=('soma', 'sum'), n_soma=('n_soma', 'sum'), perguntas=('perguntas', 'sum'))
+    agrupado = agrupado[agrupado['n_soma'] > 0].reset_index().rename(columns={por: 'grupo', 'primeira': 'dimensao'})
+    return agrupado.astype({'soma': np.float64, 'perguntas': np.int64})[colunas]
+
+
+# Dados do gráfico 'Pontuação por Subdimensão' a partir do cubo: o gráfico
+# recebe uma linha por Subdimensão (ou Dimensão), não uma por pergunta
+def chart_data(cube, ceasa, filtro_dim=None, filtro_subdim=None, por='subdimensao'):
+    celulas = _celulas(cube, ceasa, filtro_dim, filtro_subdim)
+    if celulas is None or (SOMA_PTS, 'sum') not in celulas.columns:
+        return chart_groups(pd.DataFrame(columns=['dimensao', 'subdimensao', 'soma', 'n_soma', 'perguntas']), por)
+    return chart_groups(pd.DataFrame({
+        'dimensao': celulas.index.get_level_values('dimensao'),
+        'subdimensao': celulas.index.get_level_values('subdimensao'),
+        'soma': celulas[(SOMA_PTS, 'sum')].to_numpy(),
+        'n_soma': celulas[(SOMA_PTS, 'count')].to_numpy(),
+        'perguntas': celulas[('perguntas', '')].to_numpy(),
+    }), por)
+
+
+# Soma de uma métrica por Ceasa (comparativo entre Ceasas)
+def soma_por_ceasa(cube, metrica=PONTOS, ceasas=None):
+    if cube.empty or (metrica, 'sum') not in cube.columns:
+        return pd.Series(dtype='float64')
+    somas = cube[(metrica, 'sum')].groupby(level='ceasa', sort=False).sum()
+    if ceasas is not None:
+        somas = somas.reindex([c for c in ceasas if c in somas.index])
+    return somas
+
+
+# Ranking do comparativo: as `n` maiores somas em ordem decrescente, mais
+# os Ceasas de `fixos` que ficaram fora delas; os demais viram uma única
+# linha 'Outros (k)'. O gráfico tem no máximo n + len(fixos) + 1 barras,
+# qualquer que seja o número de Ceasas. Devolve (somas, nome da linha
+# 'Outros' ou None).
+def ranking(somas, n, fixos=()):
+    ordenado = somas.sort_values(ascending=False, kind='stable')
+    mostrar = (np.arange(len(ordenado)) < n) | ordenado.index.isin(list(fixos))
+    resto = ordenado[~mostrar]
+    if resto.empty:
+        return ordenado, None
+    outros = f'Outros ({len(resto)})'
+    return pd.concat([ordenado[mostrar], pd.Series({outros: resto.sum()})]), outros
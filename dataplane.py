@@ -0,0 +1,109 @@
+# Plano de dados compartilhado entre processos.
+#
+# O frame carregado e normalizado de cada fonte é publicado uma vez como
+# arquivo Arrow IPC (sem compressão) e mapeado em memória, somente
+# leitura, por todos os processos do servidor: réplicas na mesma máquina
+# dividem as mesmas páginas em vez de manter cada uma sua cópia. Uma
+# versão nova dos dados é um arquivo novo (o hash faz parte do nome).
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from loader import SNAPSHOT_DIR, load_source, older_versions, source_fingerprint, source_key, version_file
+from singleflight import file_lock
+
+
+def _default_dir():
+    # /dev/shm é memória compartilhada (tmpfs); sem ele, fica junto dos snapshots
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return Path('/dev/shm') / 'dash-notria'
+    return SNAPSHOT_DIR / 'plane'
+
+
+PLANE_DIR = Path(os.environ.get('DASH_PLANE_DIR') or _default_dir())
+
+# 'off' desliga o plano compartilhado (cada processo carrega sua cópia)
+DATA_PLANE = os.environ.get('DASH_DATA_PLANE', 'on')
+
+# Versão do formato do arquivo; mudar quando load_source/compact mudarem
+# o frame gerado, para não mapear publicações antigas
+PLANE_FORMAT = 3
+META_KEY = b'dash'
+
+
+def plane_file(path, digest):
+    return version_file(PLANE_DIR, path, PLANE_FORMAT, digest, 'arrow')
+
+
+def _array(serie):
+    if pd.api.types.is_float_dtype(serie) or pd.api.types.is_integer_dtype(serie):
+        # Direto do numpy: NaN continua NaN (sem máscara de nulos), o que
+        # permite ler a coluna de volta sem cópia
+        return pa.array(serie.to_numpy())
+    return pa.array(serie, from_pandas=True)
+
+
+# Grava o frame como Arrow IPC. Os nomes das colunas (tuplas do
+# multi-index) e o relatório de memória vão nos metadados do schema.
+def publish(path, df, digest):
+    destino = plane_file(path, digest)
+    if destino.exists():
+        return destino
+    PLANE_DIR.mkdir(parents=True, exist_ok=True)
+    colunas = [list(c) if isinstance(c, tuple) else c for c in df.columns]
+    tabela = pa.table(
+        [_array(df.iloc[:, i]) for i in range(df.shape[1])],
+        names=[str(i) for i in range(df.shape[1])],
+    )
+    meta = {'columns': colunas, 'memory': df.attrs.get('memory'), 'source': str(path)}
+    tabela = tabela.replace_schema_metadata({META_KEY: json.dumps(meta, ensure_ascii=False)})
+    tmp = destino.with_name(f'{destino.name}.{os.getpid()}.tmp')
+    with pa.OSFile(str(tmp), 'wb') as sink, pa.ipc.new_file(sink, tabela.schema) as writer:
+        writer.write_table(tabela)
+    os.replace(tmp, destino)
+    # Versões anteriores: quem ainda as mapeia continua lendo até remapear
+    for antigo in older_versions(PLANE_DIR, path, PLANE_FORMAT, 'arrow', destino):
+        antigo.unlink(missing_ok=True)
+    return destino
+
+
+# Abre o arquivo mapeado em memória. Colunas numéricas apontam direto para
+# as páginas do arquivo (somente leitura); as demais são convertidas.
+def open_mapped(arquivo):
+    with pa.memory_map(str(arquivo), 'r') as fonte:
+        tabela = pa.ipc.open_file(fonte).read_all()
+    meta = json.loads(tabela.schema.metadata[META_KEY])
+    df = tabela.to_pandas(split_blocks=True)
+    colunas = [tuple(c) if isinstance(c, list) else c for c in meta['columns']]
+    df.columns = pd.MultiIndex.from_tuples(colunas) if colunas and all(isinstance(c, tuple) for c in colunas) else colunas
+    if meta.get('memory'):
+        df.attrs['memory'] = meta['memory']
+    return df
+
+
+# Loader do DataStore: mapeia a versão publicada da fonte; se ainda não
+# existe, carrega, publica e mapeia (o frame privado é descartado). Só um
+# processo por vez lê e publica; os outros esperam e mapeiam o resultado.
+def load_shared(path):
+    if DATA_PLANE == 'off':
+        return load_source(path)
+    digest, _ = source_fingerprint(path)
+    arquivo = plane_file(path, digest)
+    if not arquivo.exists():
+        with file_lock(PLANE_DIR / f'{source_key(path)}.lock'):
+            if not arquivo.exists():
+                df = load_source(path)
+                try:
+                    arquivo = publish(path, df, digest)
+                except (OSError, pa.ArrowException, TypeError, ValueError):
+                    # Sem onde gravar ou tipo que o Arrow não representa
+                    return df
+    try:
+        return open_mapped(arquivo)
+    except (OSError, pa.ArrowException, KeyError, ValueError):
+        arquivo.unlink(missing_ok=True)
+        return load_source(path)
+
@@ -0,0 +1,96 @@
+import io
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from filters import select
+from table import column_label
+
+# Linhas convertidas por vez; o arquivo é montado em partes, sem uma cópia
+# convertida (texto, tabela Arrow ou células) da tabela inteira
+CHUNK_ROWS = int(os.environ.get('DASH_EXPORT_CHUNK', '10000'))
+
+# Exportações simultâneas no processo (as demais esperam a vez)
+MAX_EXPORTS = int(os.environ.get('DASH_MAX_EXPORTS', '2'))
+
+FORMATS = {
+    'csv': ('CSV', 'text/csv'),
+    'parquet': ('Parquet', 'application/vnd.apache.parquet'),
+    'xlsx': ('XLSX', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+_slots = threading.BoundedSemaphore(MAX_EXPORTS)
+
+
+def _partes(frame):
+    for inicio in range(0, len(frame), CHUNK_ROWS):
+        yield frame.iloc[inicio:inicio + CHUNK_ROWS]
+
+
+def _write_csv(frame, out):
+    texto = io.TextIOWrapper(out, encoding='utf-8-sig', newline='', write_through=True)
+    if not len(frame):
+        frame.to_csv(texto, index=False)
+    for i, parte in enumerate(_partes(frame)):
+        parte.to_csv(texto, index=False, header=(i == 0))
+    texto.detach()
+
+
+def _write_parquet(frame, out):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(frame.iloc[:0], preserve_index=False)
+    with pq.ParquetWriter(out, schema) as writer:
+        for parte in _partes(frame):
+            writer.write_table(pa.Table.from_pandas(parte, schema=schema, preserve_index=False))
+
+
+def _valor(v):
+    if v is None or (isinstance(v, float) and np.isnan(v)) or v is pd.NA:
+        return None
+    return v.item() if isinstance(v, np.generic) else v
+
+
+def _write_xlsx(frame, out):
+    from openpyxl import Workbook
+
+    # write_only: as linhas vão direto para o arquivo, sem montar as células em memória
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Tabela Detalhada')
+    ws.append(list(frame.columns))
+    for parte in _partes(frame):
+        for linha in parte.astype(object).itertuples(index=False, name=None):
+            ws.append([_valor(v) for v in linha])
+    wb.save(out)
+
+
+_WRITERS = {'csv': _write_csv, 'parquet': _write_parquet, 'xlsx': _write_xlsx}
+
+
+def _plano(frame):
+    frame = frame.set_axis([column_label(c) for c in frame.columns], axis=1)
+    return frame.reset_index(drop=True)
+
+
+# Recorte da tabela (linhas filtradas e colunas) com nomes de coluna planos
+def export_frame(df, positions, cols):
+    return _plano(select(df, positions, cols))
+
+
+# Gera o arquivo de um frame no formato pedido e retorna o conteúdo (bytes).
+# O Streamlit guarda o arquivo inteiro em memória para servir o download;
+# o limite de exportações simultâneas segura o pico de memória.
+def write(frame, fmt):
+    out = io.BytesIO()
+    with _slots:
+        _WRITERS[fmt](_plano(frame), out)
+    return out.getvalue()
+
+
+# Arquivo do recorte da tabela. Chamado só no clique do botão de download,
+# em uma thread separada do rerun.
+def export(df, positions, cols, fmt):
+    return write(select(df, positions, cols), fmt)
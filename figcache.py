@@ -0,0 +1,77 @@
+import threading
+from collections import OrderedDict
+
+from singleflight import SingleFlight
+
+# Orçamento padrão do cache de gráficos (bytes de JSON serializado)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+# Forma canônica de um conjunto de filtros: a ordem das escolhas no
+# multiselect não muda o gráfico, então não deve mudar a chave
+def canonical_filters(filtros):
+    return tuple(sorted(
+        (str(col), tuple(sorted(map(str, valores))))
+        for col, valores in filtros.items() if valores
+    ))
+
+
+def figure_key(kind, ceasa, filtros, versao):
+    return (kind, ceasa, canonical_filters(filtros), versao)
+
+
+# Cache LRU de figuras Plotly limitado por bytes. O custo de cada entrada
+# é o tamanho do JSON da figura, medido uma vez ao inserir. Sessões que
+# pedem a mesma figura ausente ao mesmo tempo esperam uma única construção.
+class FigureCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._flights = SingleFlight()
+
+    def get_or_build(self, key, builder):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        return self._flights.do(key, lambda: self._build(key, builder), kind='figure')
+
+    def _build(self, key, builder):
+        fig = builder()
+        size = len(fig.to_json())
+        with self._lock:
+            if key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = (fig, size)
+                self.bytes += size
+                while self.bytes > self.max_bytes:
+                    _, (_, old_size) = self._entries.popitem(last=False)
+                    self.bytes -= old_size
+                    self.evictions += 1
+        return fig
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0,
+                'coalesced': self._flights.stats().get('figure', {}).get('coalesced', 0),
+            }
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from config import COL_DIMENSAO, COL_SUBDIMENSAO
+
+
+# Índice invertido dos filtros da barra lateral. Cada coluna filtrável é
+# codificada como categoria uma única vez e guarda, para cada valor, as
+# posições (ordenadas) das linhas onde ele aparece. Uma combinação de
+# filtros vira uniões/interseções de arrays de inteiros, sem comparar
+# strings nem copiar o DataFrame a cada rerun.
+class FilterIndex:
+    def __init__(self, df, columns=(COL_DIMENSAO, COL_SUBDIMENSAO)):
+        self.n_rows = len(df)
+        self._values = {}
+        self._postings = {}
+        for col in columns:
+            if col not in df.columns:
+                continue
+            codes, categorias = pd.factorize(df[col], use_na_sentinel=True)
+            ordem = np.argsort(codes, kind='stable')
+            limites = np.searchsorted(codes[ordem], np.arange(len(categorias) + 1))
+            self._values[col] = list(categorias)
+            self._postings[col] = {
+                valor: ordem[limites[i]:limites[i + 1]].astype(np.int64)
+                for i, valor in enumerate(categorias)
+            }
+
+    # Valores distintos da coluna, na ordem em que aparecem na planilha
+    def values(self, col):
+        return list(self._values.get(col, []))
+
+    # Posições das linhas que atendem os filtros ({coluna: [valores]}).
+    # Retorna None quando nenhum filtro está ativo (todas as linhas).
+    def positions(self, selecoes):
+        resultado = None
+        for col, escolhidos in selecoes.items():
+            if not escolhidos:
+                continue
+            postings = self._postings.get(col)
+            if postings is None:
+                # Coluna inexistente: o filtro não seleciona nenhuma linha
+                return np.empty(0, dtype=np.int64)
+            listas = [postings[v] for v in escolhidos if v in postings]
+            uniao = np.unique(np.concatenate(listas)) if listas else np.empty(0, dtype=np.int64)
+            resultado = uniao if resultado is None else np.intersect1d(resultado, uniao, assume_unique=True)
+        return resultado
+
+
+# Recorte do DataFrame: apenas as linhas filtradas e as colunas pedidas
+def select(df, positions, cols):
+    cols = [c for c in cols if c in df.columns]
+    col_pos = [df.columns.get_loc(c) for c in cols]
+    if positions is None:
+        return df.iloc[:, col_pos]
+    return df.iloc[positions, col_pos]
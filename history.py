@@ -0,0 +1,237 @@
+# Histórico das rodadas de avaliação.
+#
+# As planilhas são sobrescritas a cada rodada; este módulo guarda as
+# rodadas em arquivos Parquet que só recebem acréscimos, com chave
+# (rodada, Ceasa, pergunta). Cada ingestão grava apenas as células que
+# mudaram em relação ao estado anterior do Ceasa e um resumo (rollup) da
+# rodada por Subdimensão, de onde saem os gráficos de evolução. O estado
+# mais recente de cada célula fica materializado (state-*.parquet) e é
+# trocado junto com o manifesto: uma ingestão não relê as rodadas anteriores.
+#
+#   python -m history --round 2025-2            # planilhas por Ceasa do DASH_DATA_DIR
+#   python -m history --round 2025-2 a.xlsx b.xlsx
+#   python -m history --list
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import DATA_DIR, PCT_SUBDIM, PONTOS
+from cube import build_cube, kpis
+from ingest import discover, question_keys
+from loader import file_fingerprint, load_source
+from tidy import QuestionMatrix
+
+HISTORY_DIR = Path(os.environ.get('DASH_HISTORY_DIR') or DATA_DIR / 'historico')
+
+# Uma célula do histórico: métrica de uma pergunta em um Ceasa
+CHAVE = ['ceasa', 'numero', 'pergunta', 'ocorrencia', 'metric']
+
+
+# Células preenchidas de um frame no formato da planilha
+def celulas(df):
+    longa = QuestionMatrix(df).long()
+    ids = question_keys(df)
+    pos = longa['question_id'].to_numpy()
+    return pd.DataFrame({
+        'ceasa': longa['ceasa'].astype(str).to_numpy(),
+        'numero': ids.get_level_values(0)[pos],
+        'pergunta': ids.get_level_values(1)[pos],
+        'ocorrencia': ids.get_level_values(2)[pos].astype(np.int32),
+        'dimensao': longa['dimensao'].astype(object).to_numpy(),
+        'subdimensao': longa['subdimensao'].astype(object).to_numpy(),
+        'metric': longa['metric'].astype(str).to_numpy(),
+        'value': longa['value'].to_numpy(),
+    })
+
+
+# Resumo de uma rodada por (Ceasa, Dimensão, Subdimensão), a partir do cubo
+def rollup(df, rodada):
+    cube = build_cube(df)
+    if cube.empty:
+        return pd.DataFrame()
+    resumo = pd.DataFrame({
+        'pontos': cube[(PONTOS, 'sum')] if (PONTOS, 'sum') in cube.columns else np.nan,
+        'perguntas': cube[('perguntas', '')],
+        'pct_subdim': cube[(PCT_SUBDIM, 'mean')] if (PCT_SUBDIM, 'mean') in cube.columns else np.nan,
+    }).reset_index()
+    resultado = {ceasa: kpis(cube, ceasa)['media_result'] for ceasa in resumo['ceasa'].unique()}
+    resumo['resultado'] = resumo['ceasa'].map(resultado).astype(np.float64)
+    resumo.insert(0, 'round', rodada)
+    return resumo
+
+
+def _write_parquet(df, path):
+    tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+class HistoryStore:
+    def __init__(self, root=HISTORY_DIR):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    @property
+    def _manifest_path(self):
+        return self.root / 'rounds.json'
+
+    def manifest(self):
+        try:
+            return json.loads(self._manifest_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {'rounds': [], 'ingests': []}
+
+    # Rodadas na ordem em que foram registradas
+    def rounds(self):
+        return self.manifest()['rounds']
+
+    # Muda a cada ingestão (chave dos caches de gráficos)
+    def version(self):
+        try:
+            return str(self._manifest_path.stat().st_mtime_ns)
+        except OSError:
+            return None
+
+    def _read(self, tipo, ingests):
+        partes = [self.root / item[f'{tipo}_file'] for item in ingests if item.get(f'{tipo}_file')]
+        partes = [pd.read_parquet(p) for p in partes if p.exists()]
+        return pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+
+    # Aplica em ordem as mudanças gravadas nas ingestões
+    def _replay(self, ingests):
+        cells = self._read('cells', ingests)
+        if cells.empty:
+            return cells
+        estado = cells.drop_duplicates(CHAVE, keep='last')
+        return estado[estado['value'].notna()].reset_index(drop=True)
+
+    # Estado mais recente materializado; históricos gravados antes dele
+    # reaplicam as mudanças
+    def _latest(self, manifest):
+        arquivo = manifest.get('state_file')
+        if arquivo and (self.root / arquivo).exists():
+            return pd.read_parquet(self.root / arquivo)
+        return self._replay(manifest['ingests'])
+
+    # Valores de cada célula ao fim de uma rodada (padrão: a última)
+    def state(self, ceasas=None, ate=None):
+        manifest = self.manifest()
+        if ate is None:
+            estado = self._latest(manifest)
+        else:
+            limite = manifest['rounds'].index(ate)
+            estado = self._replay([i for i in manifest['ingests'] if manifest['rounds'].index(i['round']) <= limite])
+        if ceasas is not None and not estado.empty:
+            estado = estado[estado['ceasa'].isin(ceasas)].reset_index(drop=True)
+        return estado
+
+    # Registra uma planilha como parte da rodada. Retorna quantas células
+    # mudaram, ou None se este mesmo arquivo já foi registrado na rodada.
+    def ingest(self, path, rodada):
+        digest, _ = file_fingerprint(path)
+        with self._lock:
+            manifest = self.manifest()
+            if any(i['sha256'] == digest and i['round'] == rodada for i in manifest['ingests']):
+                return None
+            df = load_source(path)
+            novas = celulas(df)
+            ceasas = sorted(novas['ceasa'].unique())
+            estado = self._latest(manifest)
+            anterior = estado[estado['ceasa'].isin(ceasas)] if not estado.empty else estado
+
+            if anterior.empty:
+                mudancas = novas
+            else:
+                chaves = pd.MultiIndex.from_frame(novas[CHAVE])
+                antes = anterior.set_index(CHAVE)['value'].reindex(chaves).to_numpy()
+                alterada = np.isnan(antes) | (antes != novas['value'].to_numpy())
+                # Células que ficaram vazias entram com valor vazio
+                removidas = anterior[~pd.MultiIndex.from_frame(anterior[CHAVE]).isin(chaves)]
+                mudancas = pd.concat([novas[alterada], removidas[novas.columns].assign(value=np.nan)],
+                                     ignore_index=True)
+            mudancas = mudancas.assign(round=rodada)
+
+            self.root.mkdir(parents=True, exist_ok=True)
+            seq = len(manifest['ingests'])
+            registro = {'round': rodada, 'source': Path(path).name, 'sha256': digest, 'ceasas': ceasas,
+                        'cells': len(mudancas), 'at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+            estado_anterior = manifest.get('state_file')
+            if len(mudancas):
+                registro['cells_file'] = f'cells-{seq:05d}.parquet'
+                _write_parquet(mudancas, self.root / registro['cells_file'])
+                # Estado novo = anterior com as mudanças aplicadas; só passa a
+                # valer quando o manifesto que aponta para ele é gravado
+                estado = mudancas if estado.empty else pd.concat([estado, mudancas], ignore_index=True)
+                estado = estado.drop_duplicates(CHAVE, keep='last')
+                manifest['state_file'] = f'state-{seq:05d}.parquet'
+                _write_parquet(estado[estado['value'].notna()], self.root / manifest['state_file'])
+            resumo = rollup(df, rodada)
+            if not resumo.empty:
+                registro['rollup_file'] = f'rollup-{seq:05d}.parquet'
+                _write_parquet(resumo, self.root / registro['rollup_file'])
+            if rodada not in manifest['rounds']:
+                manifest['rounds'].append(rodada)
+            manifest['ingests'].append(registro)
+            tmp = self._manifest_path.with_name(f'rounds.json.{os.getpid()}.tmp')
+            tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding='utf-8')
+            os.replace(tmp, self._manifest_path)
+            if estado_anterior and estado_anterior != manifest.get('state_file'):
+                (self.root / estado_anterior).unlink(missing_ok=True)
+            return len(mudancas)
+
+    # Rollups de todas as rodadas (lidos uma vez por versão do histórico)
+    def rollups(self):
+        versao = self.version()
+        cache = self._cache.get('rollups')
+        if cache is not None and cache[0] == versao:
+            return cache[1]
+        manifest = self.manifest()
+        resumo = self._read('rollup', manifest['ingests'])
+        if not resumo.empty:
+            # Rodada registrada de novo (correção): vale a última ingestão
+            resumo = resumo.drop_duplicates(['round', 'ceasa', 'dimensao', 'subdimensao'], keep='last')
+            resumo['round'] = pd.Categorical(resumo['round'], categories=manifest['rounds'], ordered=True)
+            resumo = resumo.sort_values('round', kind='stable').reset_index(drop=True)
+        self._cache['rollups'] = (versao, resumo)
+        return resumo
+
+    # Evolução de um Ceasa: (Resultado da Matriz por rodada, % por Subdimensão por rodada)
+    def trend(self, ceasa):
+        resumo = self.rollups()
+        if resumo.empty:
+            return resumo, resumo
+        resumo = resumo[resumo['ceasa'] == ceasa]
+        total = resumo.drop_duplicates('round')[['round', 'resultado']].reset_index(drop=True)
+        return total, resumo[['round', 'dimensao', 'subdimensao', 'pct_subdim', 'pontos', 'perguntas']]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Registra as planilhas atuais como uma rodada de avaliação')
+    parser.add_argument('arquivos', nargs='*', help='planilhas (padrão: as planilhas por Ceasa do DASH_DATA_DIR)')
+    parser.add_argument('--round', help='nome da rodada (ex.: 2025-2)')
+    parser.add_argument('--list', action='store_true', help='lista as rodadas registradas')
+    args = parser.parse_args(argv)
+
+    store = HistoryStore()
+    if args.list:
+        for item in store.manifest()['ingests']:
+            print(f"{item['round']:<12} {item['source']:<45} {item['cells']:>7} células  {item['at']}")
+        return
+    if not args.round:
+        parser.error('informe --round')
+    for path in args.arquivos or discover(DATA_DIR):
+        n = store.ingest(path, args.round)
+        estado = 'já registrada' if n is None else f'{n} células alteradas'
+        print(f'{Path(path).name}: {estado}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
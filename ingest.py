@@ -0,0 +1,100 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import pandas as pd
+
+from config import CEASAS, COLS_ID, COL_NUMERO, COL_PERGUNTA, CONSOLIDATED_FILES
+from tidy import ceasas_da_planilha
+
+PATTERN = 'Matriz_Avaliativa_*.xlsx'
+
+
+# Planilhas por Ceasa do diretório (as consolidadas à mão ficam de fora)
+def discover(data_dir):
+    return sorted(
+        p for p in Path(data_dir).glob(PATTERN)
+        if p.name not in CONSOLIDATED_FILES and not p.name.startswith('~$')
+    )
+
+
+def _load(path):
+    # Import local: o processo filho (spawn) só precisa do loader
+    from loader import load_workbook
+    return load_workbook(path)
+
+
+# Lê as planilhas em paralelo. As que já têm snapshot válido são lidas
+# direto do Parquet; só as alteradas vão para o pool de processos.
+def load_all(paths, max_workers=None):
+    from loader import has_snapshot, load_workbook
+
+    frames = {}
+    pendentes = []
+    for path in paths:
+        if has_snapshot(path):
+            frames[path] = load_workbook(path)
+        else:
+            pendentes.append(path)
+    workers = min(len(pendentes), max_workers or os.cpu_count() or 1)
+    if workers > 1:
+        # spawn: o servidor do Streamlit tem várias threads e fork não é seguro
+        ctx = multiprocessing.get_context('spawn')
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+                for path, df in zip(pendentes, pool.map(_load, pendentes)):
+                    frames[path] = df
+        except BrokenProcessPool:
+            # Sem como iniciar processos filhos: segue na sequência
+            pass
+    for path in pendentes:
+        if path not in frames:
+            frames[path] = _load(path)
+    return [frames[p] for p in paths]
+
+
+# Chave de junção de cada linha: (Nº, Pergunta, ocorrência). A ocorrência
+# desempata perguntas repetidas com o mesmo número na matriz.
+def question_keys(df):
+    ids = df[[COL_NUMERO, COL_PERGUNTA]].astype(str)
+    ids.columns = ['n', 'pergunta']
+    ocorrencia = ids.groupby(['n', 'pergunta'], sort=False).cumcount()
+    return pd.MultiIndex.from_arrays([ids['n'], ids['pergunta'], ocorrencia])
+
+
+# Ceasas cadastrados em CEASAS primeiro, na ordem do cadastro; os demais em
+# ordem alfabética
+def ordem_ceasas(nomes):
+    cadastrados = [c for c in CEASAS if c in nomes]
+    return cadastrados + sorted(c for c in nomes if c not in CEASAS)
+
+
+# Junta as planilhas por Ceasa em um único frame no formato da planilha
+# consolidada: colunas de identificação seguidas do bloco de cada Ceasa
+def merge_frames(frames):
+    ids = None
+    blocos = {}
+    for df in frames:
+        df = df.set_axis(question_keys(df), axis=0)
+        atual = df[[c for c in COLS_ID if c in df.columns]]
+        if ids is None:
+            ids = atual
+        else:
+            # Perguntas que só existem nesta planilha vão para o fim
+            novas = atual.index.difference(ids.index, sort=False)
+            ids = pd.concat([ids, atual.loc[novas]])
+        for ceasa in ceasas_da_planilha(df):
+            if ceasa not in blocos:
+                blocos[ceasa] = df[[c for c in df.columns if c[0] == ceasa]]
+    if ids is None:
+        return pd.DataFrame()
+    partes = [ids] + [blocos[c].reindex(ids.index) for c in ordem_ceasas(list(blocos))]
+    merged = pd.concat(partes, axis=1)
+    return merged.reset_index(drop=True)
+
+
+# Frame consolidado a partir de todas as planilhas por Ceasa do diretório
+def ingest_directory(data_dir, max_workers=None):
+    return merge_frames(load_all(discover(data_dir), max_workers=max_workers))
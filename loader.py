@@ -0,0 +1,355 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+import scoring
+from compact import normalize
+from config import COL_DIMENSAO, COL_SUBDIMENSAO
+from singleflight import SingleFlight
+from xlsx_stream import read_xlsx_stream
+
+log = logging.getLogger(__name__)
+
+# Diretório onde ficam os snapshots colunares (Parquet) das planilhas
+SNAPSHOT_DIR = Path(os.environ.get('DASH_SNAPSHOT_DIR', '.snapshots'))
+
+HASH_CHUNK = 1 << 20
+
+# Versão do formato do snapshot; mudar quando read_workbook mudar o
+# DataFrame gerado, para não reaproveitar snapshots antigos
+SNAPSHOT_FORMAT = 2
+
+# Leitor da planilha: 'pandas' (pd.read_excel, que já usa o openpyxl em
+# modo somente leitura) ou 'stream' (xlsx_stream, linha a linha). O bench
+# mede tempo e pico de memória dos dois; o 'stream' não usa menos memória
+# e é mais lento, por isso fica só como opção.
+XLSX_READER = os.environ.get('DASH_XLSX_READER', 'pandas')
+
+
+# Lê a planilha original e organiza os dados
+def read_workbook(path, reader=None):
+    if (reader or XLSX_READER) == 'stream':
+        df = read_xlsx_stream(path, header_rows=2)
+    else:
+        df = pd.read_excel(path, header=[0, 1])
+    # Dimensão/Subdimensão só vêm preenchidas na primeira linha de cada
+    # bloco (células mescladas); repete o valor nas demais perguntas
+    for col in [COL_DIMENSAO, COL_SUBDIMENSAO]:
+        if col in df.columns:
+            df[col] = df[col].ffill()
+    return df
+
+
+# Hash do conteúdo da planilha (sha256)
+def content_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _meta_path(path):
+    return SNAPSHOT_DIR / f'{Path(path).name}.json'
+
+
+def _read_meta(path):
+    try:
+        return json.loads(_meta_path(path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+# Identifica a versão da planilha: mtime/tamanho evitam recalcular o hash
+# quando o arquivo não mudou; o hash só é recalculado se o mtime mudar.
+def file_fingerprint(path):
+    stat = os.stat(path)
+    meta = _read_meta(path)
+    if meta.get('mtime_ns') == stat.st_mtime_ns and meta.get('size') == stat.st_size and meta.get('sha256'):
+        return meta['sha256'], stat.st_mtime_ns
+    return content_hash(path), stat.st_mtime_ns
+
+
+def snapshot_path(path, digest):
+    return SNAPSHOT_DIR / f'{Path(path).stem}-v{SNAPSHOT_FORMAT}-{digest[:16]}.parquet'
+
+
+def _write_snapshot(path, df, digest, mtime_ns):
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    target = snapshot_path(path, digest)
+    tmp = target.with_suffix('.parquet.tmp')
+    df.to_parquet(tmp)
+    os.replace(tmp, target)
+    # Remove snapshots de versões anteriores da mesma planilha
+    for old in SNAPSHOT_DIR.glob(f'{Path(path).stem}-v*-*.parquet'):
+        if old != target:
+            old.unlink(missing_ok=True)
+    meta = {'source': str(path), 'sha256': digest, 'mtime_ns': mtime_ns, 'size': os.stat(path).st_size}
+    _meta_path(path).write_text(json.dumps(meta), encoding='utf-8')
+
+
+# Indica se a versão atual da planilha já tem snapshot colunar
+def has_snapshot(path):
+    digest, _ = file_fingerprint(path)
+    return snapshot_path(path, digest).exists()
+
+
+# Fontes de dados: uma planilha ou um diretório de planilhas por Ceasa
+# (ingest.py junta todas em um frame consolidado)
+def source_mtime(path):
+    if os.path.isdir(path):
+        from ingest import discover
+        return max([os.stat(path).st_mtime_ns] + [os.stat(p).st_mtime_ns for p in discover(path)])
+    return os.stat(path).st_mtime_ns
+
+
+# Nome estável de uma fonte para os arquivos derivados dela (plano de
+# dados, bancos SQL): nome do arquivo e hash do caminho absoluto
+def source_key(path):
+    absoluto = os.path.abspath(path)
+    nome = Path(absoluto).stem or 'fonte'
+    return f'{nome}-{hashlib.sha256(absoluto.encode("utf-8")).hexdigest()[:12]}'
+
+
+# Arquivo derivado de uma versão da fonte. O modo de recálculo
+# (DASH_RECOMPUTE) muda o frame de load_source e entra no nome, como o
+# formato: servidores com modos diferentes não usam o arquivo um do outro.
+def version_file(pasta, path, formato, digest, ext):
+    return Path(pasta) / f'{source_key(path)}-v{formato}-{scoring.RECOMPUTE}-{digest[:16]}.{ext}'
+
+
+# Arquivos de outras versões da fonte em `pasta`, exceto `atual` e os dos
+# outros modos de recálculo no formato atual (ainda em uso por outros
+# servidores)
+def older_versions(pasta, path, formato, ext, atual):
+    chave = source_key(path)
+    for arquivo in Path(pasta).glob(f'{chave}-v*.{ext}'):
+        mesmo_modo = arquivo.name.startswith(f'{chave}-v{formato}-{scoring.RECOMPUTE}-')
+        if arquivo != atual and (mesmo_modo or not arquivo.name.startswith(f'{chave}-v{formato}-')):
+            yield arquivo
+
+
+def source_fingerprint(path):
+    if not os.path.isdir(path):
+        return file_fingerprint(path)
+    from ingest import discover
+    h = hashlib.sha256()
+    for p in discover(path):
+        h.update(f'{p.name}:{file_fingerprint(p)[0]}\n'.encode('utf-8'))
+    return h.hexdigest(), source_mtime(path)
+
+
+# Carrega a fonte com as métricas derivadas completas (scoring.apply) e
+# normalizada (compact.normalize); o uso de memória antes/depois fica em
+# df.attrs['memory']
+def load_source(path):
+    if os.path.isdir(path):
+        from ingest import ingest_directory
+        df = ingest_directory(path)
+    else:
+        df = load_workbook(path)
+    df, relatorio = normalize(scoring.apply(df))
+    df.attrs['memory'] = relatorio
+    return df
+
+
+# Carrega a planilha a partir do snapshot colunar; só volta ao xlsx
+# quando o conteúdo da planilha muda
+def load_workbook(path):
+    digest, mtime_ns = file_fingerprint(path)
+    snap = snapshot_path(path, digest)
+    if snap.exists():
+        try:
+            df = pd.read_parquet(snap)
+        except Exception:
+            snap.unlink(missing_ok=True)
+        else:
+            meta = _read_meta(path)
+            if meta.get('mtime_ns') != mtime_ns:
+                # Mesmo conteúdo com mtime novo (ex.: cópia no deploy)
+                meta.update({'sha256': digest, 'mtime_ns': mtime_ns, 'size': os.stat(path).st_size})
+                try:
+                    _meta_path(path).write_text(json.dumps(meta), encoding='utf-8')
+                except OSError:
+                    pass
+            return df
+    df = read_workbook(path)
+    try:
+        _write_snapshot(path, df, digest, mtime_ns)
+    except Exception:
+        # Sem permissão de escrita ou tipo não suportado pelo Parquet:
+        # segue apenas com a leitura do xlsx
+        pass
+    return df
+
+
+# Uma versão carregada de uma planilha e os artefatos derivados dela
+# (agregados, índices...), calculados uma única vez por versão
+class Dataset:
+    def __init__(self, path, df, sha256, mtime_ns, flights=None):
+        self.path = path
+        self.df = df
+        self.sha256 = sha256
+        self.mtime_ns = mtime_ns
+        self.memory = df.attrs.get('memory')
+        self._derived = {}
+        # Sessões que pedem o mesmo derivado ao mesmo tempo esperam uma única
+        # construção; derivados diferentes são montados em paralelo, e um
+        # pode depender de outro (cubo <- matriz)
+        self._flights = flights if flights is not None else SingleFlight()
+
+    def derived(self, key, builder):
+        value = self._derived.get(key)
+        if value is None:
+            value = self._flights.do(('derived', self.path, self.sha256, key),
+                                     lambda: self._build(key, builder), kind='derived')
+        return value
+
+    def _build(self, key, builder):
+        value = self._derived.get(key)
+        if value is None:
+            value = self._derived[key] = builder(self.df)
+        return value
+
+
+# Uma versão de cada fonte de dados por processo. A troca para uma versão
+# nova é atômica: quem está no meio de uma sessão continua usando a antiga
+# enquanto a nova é montada em segundo plano. Uma versão nova que falha
+# fica registrada (com o erro) e não é lida de novo a cada rerun. As
+# subclasses montam a versão (`_build`), que precisa ter `sha256` e
+# `mtime_ns` (DataStore: Dataset; sqlstore.SqlStores: SqlStore).
+class VersionedStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._reloading = {}
+        # Última recarga que falhou, por fonte: {'mtime_ns', 'sha256', 'error'}
+        self._failed = {}
+        self.flights = SingleFlight()
+
+    def _build(self, path, digest, mtime_ns):
+        raise NotImplementedError
+
+    # Versão atual da fonte; só bloqueia na primeira carga
+    def _current(self, path):
+        path = str(path)
+        entry = self._entries.get(path)
+        if entry is None:
+            return self.flights.do(('first', path), lambda: self._first_load(path), kind='load')
+        try:
+            mtime_ns = source_mtime(path)
+        except (OSError, ValueError):
+            return entry
+        falha = self._failed.get(path)
+        # Uma versão que já falhou não é lida de novo a cada rerun
+        if mtime_ns != entry.mtime_ns and (falha is None or falha['mtime_ns'] != mtime_ns):
+            self.refresh(path)
+        return entry
+
+    def _first_load(self, path):
+        entry = self._entries.get(path)
+        if entry is not None:
+            return entry
+        digest, mtime_ns = source_fingerprint(path)
+        entry = self._build(path, digest, mtime_ns)
+        with self._lock:
+            return self._entries.setdefault(path, entry)
+
+    def version(self, path):
+        entry = self._entries.get(str(path))
+        return entry.sha256 if entry else None
+
+    # Erro da última recarga da fonte, enquanto a versão no disco for a que
+    # falhou (a página segue com a versão anterior)
+    def reload_error(self, path):
+        falha = self._failed.get(str(path))
+        return falha['error'] if falha else None
+
+    # Verifica mtime e hash da fonte; se o conteúdo mudou, recarrega em
+    # segundo plano. Retorna True quando uma recarga foi iniciada.
+    def refresh(self, path, wait=False):
+        path = str(path)
+        with self._lock:
+            thread = self._reloading.get(path)
+            started = thread is None
+            if started:
+                thread = threading.Thread(target=self._reload, args=(path,), daemon=True)
+                self._reloading[path] = thread
+                thread.start()
+        if wait:
+            thread.join()
+        return started
+
+    def _reload(self, path):
+        digest = mtime_ns = None
+        try:
+            entry = self._entries.get(path)
+            digest, mtime_ns = source_fingerprint(path)
+            if entry is not None and entry.sha256 == digest:
+                # Mesmo conteúdo: só atualiza o mtime conhecido
+                entry.mtime_ns = mtime_ns
+                self._failed.pop(path, None)
+                return
+            falha = self._failed.get(path)
+            if falha is not None and falha['sha256'] == digest:
+                # Conteúdo que já falhou (só o mtime mudou): não lê de novo
+                falha['mtime_ns'] = mtime_ns
+                return
+            novo = self._build(path, digest, mtime_ns)
+            with self._lock:
+                self._entries[path] = novo
+                self._failed.pop(path, None)
+        except Exception as exc:
+            # Mantém a versão anterior se a fonte nova estiver ilegível
+            # (ex.: ainda sendo copiada) e guarda a falha até a fonte mudar
+            log.warning('Falha ao recarregar %s; mantendo a versão anterior', path, exc_info=True)
+            if mtime_ns is None:
+                try:
+                    mtime_ns = source_mtime(path)
+                except (OSError, ValueError):
+                    pass
+            self._failed[path] = {'mtime_ns': mtime_ns, 'sha256': digest, 'error': f'{type(exc).__name__}: {exc}'}
+        finally:
+            with self._lock:
+                self._reloading.pop(path, None)
+
+
+# Planilhas carregadas (DataFrame e derivados) por fonte.
+# Sessões que abrem a mesma fonte ao mesmo tempo (ex.: logo após um deploy)
+# dividem uma única leitura da planilha (single-flight).
+class DataStore(VersionedStore):
+    def __init__(self, loader=load_source):
+        super().__init__()
+        self._loader = loader
+
+    # Versão atual da planilha; só bloqueia na primeira carga do arquivo
+    def dataset(self, path):
+        return self._current(path)
+
+    def _build(self, path, digest, mtime_ns):
+        return Dataset(path, self._load(path, digest), digest, mtime_ns, self.flights)
+
+    # Leitura de uma versão da fonte; a primeira carga e uma recarga da
+    # mesma versão ao mesmo tempo compartilham a leitura
+    def _load(self, path, digest):
+        return self.flights.do(('source', path, digest), lambda: self._loader(path), kind='read')
+
+    def get(self, path):
+        return self.dataset(path).df
+
+    # Uso de memória de cada fonte carregada, antes e depois da normalização
+    def memory(self):
+        return {path: entry.memory for path, entry in list(self._entries.items()) if entry.memory}
+
+    # Remove apenas as entradas informadas (ou todas)
+    def evict(self, *paths):
+        with self._lock:
+            if not paths:
+                self._entries.clear()
+            for path in paths:
+                self._entries.pop(str(path), None)
@@ -0,0 +1,158 @@
+# Pré-renderiza as visões sem filtro como arquivos estáticos (HTML/JSON)
+# para servir de um servidor web comum ou CDN.
+#
+#   python -m precompute --out publico/
+#
+# Só os artefatos cujas planilhas mudaram são gerados de novo (o hash de
+# cada entrada fica em manifest.json no diretório de saída).
+import argparse
+import html
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from config import CEASAS, COLS_ID, DATA_DIR, GLOBAL_FILE, GLOBAL_SOURCE, PONTOS, data_path, slug
+
+# Mudar quando o formato dos artefatos mudar, para regenerar tudo
+ARTIFACT_VERSION = 1
+COMPARATIVO = 'comparativo'
+
+
+def _fonte(view):
+    if view == COMPARATIVO:
+        return str(DATA_DIR) if GLOBAL_SOURCE == 'merge' else data_path(GLOBAL_FILE)
+    return data_path(CEASAS[view])
+
+
+def _write(path, texto):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_text(texto, encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def _pagina(titulo, corpo):
+    return (
+        '<!DOCTYPE html><html lang="pt-BR"><head><meta charset="utf-8">'
+        f'<title>{html.escape(titulo)}</title></head><body>'
+        f'<h1>{html.escape(titulo)}</h1>{corpo}</body></html>'
+    )
+
+
+def _tabela_json(tabela):
+    from table import column_label
+    return json.dumps({
+        'columns': [column_label(c) for c in tabela.columns],
+        'data': json.loads(tabela.to_json(orient='values', force_ascii=False)),
+    }, ensure_ascii=False)
+
+
+# Executado nos processos filhos: gera os artefatos de uma visão
+def render_view(view, df, destino):
+    from cube import build_cube, chart_data, kpis
+    from filters import select
+    from tidy import QuestionMatrix
+    from views import fig_comparativo, fig_subdimensao
+
+    destino = Path(destino)
+    matriz = QuestionMatrix(df)
+    arquivos = []
+    if view == COMPARATIVO:
+        somas = matriz.present_totals(PONTOS)
+        valores = {
+            'total_perguntas': len(df),
+            'soma_total_pontos': float(somas.sum()),
+            'soma_por_ceasa': {c: float(v) for c, v in somas.items()},
+        }
+        fig = fig_comparativo(somas)
+        titulo = 'Dashboard Avaliativo - Ceasas'
+        tabela = None
+    else:
+        cube = build_cube(df, matriz)
+        k = kpis(cube, view)
+        # NaN não é JSON válido: seleção vazia vira null
+        valores = {chave: None if v != v else v.item() if hasattr(v, 'item') else v for chave, v in k.items()}
+        fig = fig_subdimensao(chart_data(cube, view), view)
+        titulo = f'Dashboard Avaliativo - {view}'
+        tabela = select(df, None, COLS_ID + [c for c in df.columns if c[0] == view])
+
+    _write(destino / 'kpis.json', json.dumps(valores, ensure_ascii=False, indent=2))
+    _write(destino / 'figura.json', fig.to_json())
+    _write(destino / 'figura.html', fig.to_html(include_plotlyjs='cdn', full_html=True))
+    arquivos += ['kpis.json', 'figura.json', 'figura.html']
+    corpo = fig.to_html(include_plotlyjs='cdn', full_html=False)
+    if tabela is not None:
+        _write(destino / 'tabela.json', _tabela_json(tabela))
+        corpo += '<h3>Tabela Detalhada</h3>' + tabela.to_html(na_rep='', border=0)
+        arquivos.append('tabela.json')
+    _write(destino / 'index.html', _pagina(titulo, corpo))
+    arquivos.append('index.html')
+    return view, arquivos
+
+
+def _load_manifest(out):
+    try:
+        return json.loads((out / 'manifest.json').read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def main(argv=None):
+    from loader import load_source, source_fingerprint
+
+    parser = argparse.ArgumentParser(description='Gera as visões dos dashboards como arquivos estáticos')
+    parser.add_argument('--out', default='publico')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help='regenera tudo')
+    args = parser.parse_args(argv)
+
+    out = Path(args.out)
+    manifest = _load_manifest(out)
+    views = [COMPARATIVO] + list(CEASAS)
+    jobs = []
+    inicio = time.perf_counter()
+    for view in views:
+        fonte = _fonte(view)
+        if not os.path.exists(fonte):
+            print(f'{view}: {fonte} não encontrado', file=sys.stderr)
+            continue
+        digest, _ = source_fingerprint(fonte)
+        entrada = f'{ARTIFACT_VERSION}:{digest}'
+        destino = out / (COMPARATIVO if view == COMPARATIVO else slug(view))
+        atual = manifest.get(view, {})
+        if not args.force and atual.get('input') == entrada and (destino / 'index.html').exists():
+            continue
+        jobs.append((view, load_source(fonte), str(destino), entrada))
+
+    gerados = []
+    workers = min(len(jobs), args.workers or os.cpu_count() or 1)
+    if workers > 1:
+        ctx = multiprocessing.get_context('spawn')
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+                futuros = [pool.submit(render_view, v, df, d) for v, df, d, _ in jobs]
+                gerados = [f.result() for f in futuros]
+        except BrokenProcessPool:
+            gerados = []
+    if len(gerados) != len(jobs):
+        gerados = [render_view(v, df, d) for v, df, d, _ in jobs]
+
+    for (view, _, destino, entrada), (_, arquivos) in zip(jobs, gerados):
+        manifest[view] = {'input': entrada, 'path': Path(destino).name, 'files': arquivos}
+        print(f'{view}: {len(arquivos)} arquivos em {destino}', file=sys.stderr)
+    links = ''.join(
+        f'<li><a href="{html.escape(manifest[v]["path"])}/index.html">{html.escape(v)}</a></li>'
+        for v in views if v in manifest
+    )
+    _write(out / 'index.html', _pagina('Dashboard Avaliativo', f'<ul>{links}</ul>'))
+    _write(out / 'manifest.json', json.dumps(manifest, ensure_ascii=False, indent=2))
+    print(f'{len(jobs)} de {len(views)} visões geradas em {time.perf_counter() - inicio:.1f}s', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+# Recalcula as métricas derivadas da matriz a partir dos Pontos.
+#
+# Na planilha, 'Soma (pts)', '% da Subdimensão', '% Total da Dimensão' e
+# 'Resultado da Matriz' são fórmulas do Excel gravadas só na primeira linha
+# de cada bloco. Aqui são recalculadas para todos os Ceasas de uma vez
+# (matriz pergunta × Ceasa), no mesmo layout, e comparadas com os valores
+# gravados na planilha:
+#
+#   python -m scoring [arquivo.xlsx ...]
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from config import PCT_DIM, PCT_SUBDIM, PONTOS, RESULTADO, SOMA_PTS
+from tidy import QuestionMatrix
+
+# Pontuação máxima de cada pergunta
+MAX_PONTOS = 2
+
+# 'missing' preenche com o recálculo só as células de início de bloco que
+# estão vazias na planilha (coluna ausente, fórmulas sem valor salvo),
+# 'always' substitui todas pelo recálculo e 'off' usa a planilha como está
+RECOMPUTE = os.environ.get('DASH_RECOMPUTE', 'missing')
+
+# Tolerância da comparação (os valores carregados são float32)
+RTOL = 1e-5
+ATOL = 1e-6
+
+
+def _grupos(*colunas):
+    chaves = pd.DataFrame({i: c for i, c in enumerate(colunas)})
+    agrupado = chaves.groupby(list(chaves.columns), dropna=False, sort=False, observed=True)
+    codigos = agrupado.ngroup().to_numpy()
+    # Primeira linha de cada grupo, onde a planilha grava o valor
+    primeira = np.full(codigos.max() + 1 if len(codigos) else 0, -1)
+    primeira[codigos[::-1]] = np.arange(len(codigos))[::-1]
+    return codigos, primeira
+
+
+def _somar(valores, codigos, n_grupos):
+    somas = np.zeros((n_grupos, valores.shape[1]))
+    np.add.at(somas, codigos, valores)
+    return somas
+
+
+# Métricas derivadas recalculadas: {métrica: matriz pergunta × Ceasa},
+# com valor só na primeira linha de cada bloco (NaN nas demais)
+def recompute(df, matriz=None):
+    matriz = matriz if matriz is not None else QuestionMatrix(df)
+    pontos = matriz.values.get(PONTOS)
+    if pontos is None:
+        return matriz.ceasas, {}
+    n, k = pontos.shape
+    p = np.nan_to_num(pontos)
+    # Perguntas sem resposta entram no denominador (2 pontos cada), como nas fórmulas
+    sub_cod, sub_primeira = _grupos(matriz.dimensao, matriz.subdimensao)
+    dim_cod, dim_primeira = _grupos(matriz.dimensao)
+    sub_soma = _somar(p, sub_cod, len(sub_primeira))
+    sub_n = np.bincount(sub_cod, minlength=len(sub_primeira))[:, None]
+    dim_soma = _somar(p, dim_cod, len(dim_primeira))
+    dim_n = np.bincount(dim_cod, minlength=len(dim_primeira))[:, None]
+
+    def no_layout(valores, primeira):
+        saida = np.full((n, k), np.nan)
+        saida[primeira] = valores
+        return saida
+
+    derivadas = {
+        SOMA_PTS: no_layout(sub_soma, sub_primeira),
+        PCT_SUBDIM: no_layout(sub_soma / (MAX_PONTOS * sub_n), sub_primeira),
+        PCT_DIM: no_layout(dim_soma / (MAX_PONTOS * dim_n), dim_primeira),
+        RESULTADO: no_layout(p.sum(axis=0, keepdims=True) / (MAX_PONTOS * n), np.array([0]) if n else np.array([], int)),
+    }
+    # Ceasas sem a coluna de Pontos não têm o que recalcular
+    sem_pontos = ~matriz.present[PONTOS]
+    for valores in derivadas.values():
+        valores[:, sem_pontos] = np.nan
+    return matriz.ceasas, derivadas
+
+
+# Células em que o valor gravado na planilha difere do recalculado
+def mismatches(df, matriz=None):
+    matriz = matriz if matriz is not None else QuestionMatrix(df)
+    ceasas, derivadas = recompute(df, matriz)
+    partes = []
+    for metrica, calculado in derivadas.items():
+        gravado = matriz.values.get(metrica)
+        if gravado is None:
+            continue
+        presente = matriz.present[metrica] & matriz.present[PONTOS]
+        iguais = np.isclose(gravado, calculado, rtol=RTOL, atol=ATOL, equal_nan=True)
+        linhas, cols = np.nonzero(~iguais & presente[None, :])
+        if len(linhas):
+            partes.append(pd.DataFrame({
+                'linha': linhas,
+                'dimensao': matriz.dimensao.to_numpy()[linhas],
+                'subdimensao': matriz.subdimensao.to_numpy()[linhas],
+                'ceasa': np.array(ceasas, dtype=object)[cols],
+                'metrica': metrica,
+                'planilha': gravado[linhas, cols],
+                'recalculado': calculado[linhas, cols],
+            }))
+    if not partes:
+        return pd.DataFrame(columns=['linha', 'dimensao', 'subdimensao', 'ceasa', 'metrica', 'planilha', 'recalculado'])
+    return pd.concat(partes, ignore_index=True)
+
+
+# Preenche as métricas derivadas conforme RECOMPUTE. Blocos que só trazem
+# respostas e Pontos (sem as fórmulas) passam a ter as métricas completas,
+# e o mesmo vale para planilhas salvas por ferramentas que não recalculam
+# as fórmulas (só parte das células de início de bloco tem valor).
+def apply(df, modo=None):
+    modo = modo or RECOMPUTE
+    if modo == 'off' or (PONTOS not in df.columns.get_level_values(1)):
+        return df
+    matriz = QuestionMatrix(df)
+    ceasas, derivadas = recompute(df, matriz)
+    novas = {}
+    for metrica, calculado in derivadas.items():
+        for j, ceasa in enumerate(ceasas):
+            if not matriz.present[PONTOS][j]:
+                continue
+            col = (ceasa, metrica)
+            if modo == 'always' or col not in df.columns:
+                novas[col] = calculado[:, j]
+                continue
+            vazias = df[col].isna().to_numpy() & ~np.isnan(calculado[:, j])
+            if vazias.any():
+                novas[col] = df[col].where(~vazias, calculado[:, j])
+    if not novas:
+        return df
+    df = df.copy()
+    for col, valores in novas.items():
+        df[col] = valores
+    # Colunas novas entram no fim do bloco do Ceasa
+    blocos = {}
+    for col in df.columns:
+        blocos.setdefault(col[0], []).append(col)
+    return df[[c for cols in blocos.values() for c in cols]]
+
+
+def main(argv=None):
+    from config import CEASAS, GLOBAL_FILE, data_path
+    from loader import load_source
+
+    padrao = [data_path(GLOBAL_FILE)] + [data_path(f) for f in CEASAS.values()]
+    arquivos = (argv if argv is not None else sys.argv[1:]) or padrao
+    total = 0
+    for path in arquivos:
+        if not os.path.exists(path):
+            continue
+        diferencas = mismatches(load_source(path))
+        total += len(diferencas)
+        print(f'{os.path.basename(path)}: {len(diferencas)} células divergentes')
+        if len(diferencas):
+            print(diferencas.to_string(index=False))
+    sys.exit(1 if total else 0)
+
+
+if __name__ == '__main__':
+    main()
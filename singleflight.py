@@ -0,0 +1,79 @@
+# Coordenação "single-flight": chamadas simultâneas com a mesma chave
+# executam a função uma única vez. A primeira (líder) faz o trabalho; as
+# demais esperam o mesmo Future e recebem o mesmo resultado (ou a mesma
+# exceção). Terminada a chamada, a chave é liberada: uma chamada posterior
+# executa de novo (o cache fica por conta de quem chama).
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {}
+
+    def _contar(self, kind, campo):
+        contadores = self._stats.setdefault(kind, {'calls': 0, 'leaders': 0, 'coalesced': 0, 'errors': 0})
+        contadores[campo] += 1
+
+    # Executa fn() uma vez por chave em andamento. `kind` agrupa os contadores
+    # (ex.: 'load', 'derived').
+    def do(self, key, fn, kind='default'):
+        with self._lock:
+            self._contar(kind, 'calls')
+            future = self._calls.get(key)
+            lider = future is None
+            if lider:
+                future = self._calls[key] = Future()
+                self._contar(kind, 'leaders')
+            else:
+                self._contar(kind, 'coalesced')
+        if not lider:
+            return future.result()
+        try:
+            resultado = fn()
+        except BaseException as exc:
+            with self._lock:
+                self._contar(kind, 'errors')
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(resultado)
+            return resultado
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    # Chaves em andamento agora
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    # Contadores por tipo: chamadas, líderes (execuções reais), coalescidas
+    # (esperaram a execução de outra sessão) e erros
+    def stats(self):
+        with self._lock:
+            return {kind: dict(contadores) for kind, contadores in self._stats.items()}
+
+
+# Versão entre processos (réplicas na mesma máquina): um lock exclusivo em
+# arquivo. Quem entra primeiro gera o artefato; os demais esperam e, ao
+# entrar, encontram o artefato pronto. Sem fcntl (Windows) ou sem onde
+# gravar o lock, não coordena.
+@contextmanager
+def file_lock(path):
+    try:
+        import fcntl
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arquivo = open(path, 'a')
+    except (ImportError, OSError):
+        yield
+        return
+    with arquivo:
+        fcntl.flock(arquivo, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(arquivo, fcntl.LOCK_UN)
@@ -0,0 +1,346 @@
+# Backend SQL opcional (DASH_BACKEND=duckdb ou sqlite).
+#
+# Os dados de cada versão da fonte são gravados uma vez em um banco
+# embutido, em arquivo (DuckDB, ou SQLite da biblioteca padrão), no formato
+# longo de tidy.py. Filtros, KPIs, comparativo, gráfico por Subdimensão e a
+# página da Tabela Detalhada viram consultas SQL, e só o resultado (poucas
+# linhas) volta para o Python. O padrão continua sendo o pandas em memória.
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    COLS_ID, COL_DIMENSAO, COL_NUMERO, COL_PERGUNTA, COL_SUBDIMENSAO, PCT_DIM, PCT_SUBDIM, PONTOS, RESULTADO,
+    SOMA_PTS,
+)
+from cube import chart_groups
+from loader import (
+    SNAPSHOT_DIR, VersionedStore, load_source, older_versions, source_fingerprint, source_key, version_file,
+)
+from scoring import mismatches
+from singleflight import file_lock
+from tidy import METRICAS, QuestionMatrix
+
+# 'pandas' (padrão), 'duckdb' ou 'sqlite'
+BACKEND = os.environ.get('DASH_BACKEND', 'pandas')
+
+SQL_DIR = SNAPSHOT_DIR / 'sql'
+
+# Versão do esquema; mudar quando as tabelas mudarem
+SQL_FORMAT = 2
+
+# Colunas de identificação -> colunas da tabela perguntas
+ID_COLS = {COL_DIMENSAO: 'dimensao', COL_SUBDIMENSAO: 'subdimensao', COL_NUMERO: 'numero', COL_PERGUNTA: 'pergunta'}
+
+
+# Motor efetivo: sem o pacote duckdb instalado, usa o SQLite
+def resolve_backend(backend=None):
+    backend = backend or BACKEND
+    if backend == 'duckdb':
+        try:
+            import duckdb  # noqa: F401
+        except ImportError:
+            return 'sqlite'
+    return backend
+
+
+def _connect(path, engine, read_only=True):
+    if engine == 'duckdb':
+        import duckdb
+        return duckdb.connect(str(path), read_only=read_only)
+    import sqlite3
+    if read_only:
+        return sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+    return sqlite3.connect(str(path))
+
+
+def _tabelas(df):
+    matriz = QuestionMatrix(df)
+    n = len(df)
+    perguntas = pd.DataFrame({'question_id': np.arange(n)})
+    for col, nome in ID_COLS.items():
+        valores = df[col] if col in df.columns else pd.Series(np.nan, index=df.index)
+        valores = valores.astype(object).where(valores.notna(), None).to_numpy()
+        if nome == 'numero':
+            valores = pd.to_numeric(pd.Series(valores), errors='coerce').to_numpy()
+        perguntas[nome] = valores
+
+    longa = matriz.long()
+    celulas = pd.DataFrame({
+        'question_id': longa['question_id'].astype(np.int64),
+        'ceasa': longa['ceasa'].astype(str),
+        'metric': longa['metric'].astype(str),
+        'value': longa['value'].astype(np.float64),
+    })
+
+    # Colunas de texto dos blocos (ex.: Respostas), também no formato longo
+    textos = []
+    colunas = []
+    for ordem, col in enumerate(df.columns):
+        colunas.append((ordem, str(col[0]), str(col[1])))
+        if col in COLS_ID or col[1] in METRICAS or col[0] not in matriz.ceasas:
+            continue
+        serie = df[col]
+        preenchido = serie.notna().to_numpy()
+        textos.append(pd.DataFrame({
+            'question_id': np.arange(n)[preenchido],
+            'ceasa': col[0],
+            'coluna': str(col[1]),
+            'valor': serie[preenchido].astype(str).to_numpy(),
+        }))
+    textos = pd.concat(textos, ignore_index=True) if textos else pd.DataFrame(
+        {'question_id': [], 'ceasa': [], 'coluna': [], 'valor': []})
+    ceasas = pd.DataFrame({'ordem': np.arange(len(matriz.ceasas)), 'ceasa': [str(c) for c in matriz.ceasas]})
+    metricas = pd.DataFrame(
+        [(c, m) for m, presente in matriz.present.items() for c, p in zip(matriz.ceasas, presente) if p],
+        columns=['ceasa', 'metric'])
+    divergencias = mismatches(df, matriz).astype({'linha': np.int64, 'planilha': np.float64, 'recalculado': np.float64})
+    for col in ('dimensao', 'subdimensao', 'ceasa'):
+        divergencias[col] = divergencias[col].astype(object).where(divergencias[col].notna(), None).astype(str)
+    return {
+        'perguntas': perguntas,
+        'celulas': celulas,
+        'textos': textos,
+        'ceasas': ceasas,
+        'metricas': metricas,
+        'colunas': pd.DataFrame(colunas, columns=['ordem', 'nivel0', 'nivel1']),
+        # Divergências da planilha (scoring.mismatches), calculadas na gravação
+        'divergencias': divergencias,
+    }
+
+
+# Grava o banco de uma versão dos dados (arquivo temporário + rename)
+def build(df, path, engine):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    tmp.unlink(missing_ok=True)
+    con = _connect(tmp, engine, read_only=False)
+    try:
+        for nome, tabela in _tabelas(df).items():
+            if engine == 'duckdb':
+                con.register('_frame', tabela)
+                con.execute(f'CREATE TABLE {nome} AS SELECT * FROM _frame')
+                con.unregister('_frame')
+            else:
+                tabela.to_sql(nome, con, index=False)
+        con.execute('CREATE INDEX celulas_ceasa ON celulas (ceasa, metric, question_id)')
+        con.execute('CREATE INDEX textos_ceasa ON textos (ceasa, coluna, question_id)')
+        con.execute('CREATE INDEX perguntas_filtros ON perguntas (dimensao, subdimensao)')
+        con.commit()
+    finally:
+        con.close()
+    os.replace(tmp, path)
+
+
+def _filtro(filtro_dim, filtro_subdim, alias='p'):
+    sql, params = [], []
+    for coluna, valores in (('dimensao', filtro_dim), ('subdimensao', filtro_subdim)):
+        if valores:
+            sql.append(f'{alias}.{coluna} IN ({", ".join("?" * len(valores))})')
+            params.extend(valores)
+    return (' AND '.join(sql) or '1=1'), params
+
+
+# Consultas dos dashboards sobre o banco de uma versão dos dados
+class SqlStore:
+    def __init__(self, path, engine, sha256, mtime_ns):
+        self.path = path
+        self.engine = engine
+        self.sha256 = sha256
+        self.mtime_ns = mtime_ns
+        self._local = threading.local()
+
+    # Abre o banco da versão atual da fonte, gravando-o na primeira vez.
+    # `fingerprint` evita recalcular o hash quando quem chama já o tem.
+    @classmethod
+    def open(cls, source, backend=None, fingerprint=None):
+        engine = resolve_backend(backend)
+        digest, mtime_ns = fingerprint or source_fingerprint(source)
+        ext = 'duckdb' if engine == 'duckdb' else 'sqlite'
+        path = version_file(SQL_DIR, source, SQL_FORMAT, digest, ext)
+        if not path.exists():
+            # Um processo grava; os outros esperam e abrem o mesmo arquivo
+            with file_lock(SQL_DIR / f'{source_key(source)}.lock'):
+                if not path.exists():
+                    build(load_source(source), path, engine)
+                    # Mantém a versão anterior: sessões (e outros processos)
+                    # ainda a usam até trocar para a nova
+                    antigos = sorted(older_versions(SQL_DIR, source, SQL_FORMAT, ext, path),
+                                     key=lambda p: p.stat().st_mtime_ns, reverse=True)
+                    for antigo in antigos[1:]:
+                        antigo.unlink(missing_ok=True)
+        return cls(path, engine, digest, mtime_ns)
+
+    # Uma conexão somente leitura por thread (sessões do Streamlit)
+    def _con(self):
+        con = getattr(self._local, 'con', None)
+        if con is None:
+            con = self._local.con = _connect(self.path, self.engine)
+        return con
+
+    def query(self, sql, params=()):
+        cur = self._con().execute(sql, list(params))
+        colunas = [d[0] for d in cur.description]
+        return pd.DataFrame(cur.fetchall(), columns=colunas)
+
+    def _escalar(self, sql, params=()):
+        return self._con().execute(sql, list(params)).fetchone()[0]
+
+    # Valores distintos de Dimensão/Subdimensão, na ordem da planilha
+    # (mesma interface de FilterIndex.values)
+    def values(self, col):
+        nome = ID_COLS.get(col)
+        if nome not in ('dimensao', 'subdimensao'):
+            return []
+        df = self.query(f'SELECT {nome} FROM perguntas WHERE {nome} IS NOT NULL '
+                        f'GROUP BY {nome} ORDER BY MIN(question_id)')
+        return df[nome].tolist()
+
+    # Ceasas da fonte, na ordem da planilha (com `metrica`, só os que têm a coluna)
+    def ceasas(self, metrica=None):
+        if metrica is None:
+            return self.query('SELECT ceasa FROM ceasas ORDER BY ordem')['ceasa'].tolist()
+        return self.query('SELECT c.ceasa FROM ceasas c JOIN metricas m ON m.ceasa = c.ceasa '
+                          'WHERE m.metric = ? ORDER BY c.ordem', [metrica])['ceasa'].tolist()
+
+    # Métricas presentes no bloco de um Ceasa
+    def metrics(self, ceasa):
+        return set(self.query('SELECT metric FROM metricas WHERE ceasa = ?', [ceasa])['metric'])
+
+    # Células divergentes do recálculo de um Ceasa
+    def mismatches(self, ceasa):
+        return self.query('SELECT * FROM divergencias WHERE ceasa = ? ORDER BY linha', [ceasa])
+
+    def count(self, filtro_dim=None, filtro_subdim=None):
+        where, params = _filtro(filtro_dim, filtro_subdim)
+        return int(self._escalar(f'SELECT COUNT(*) FROM perguntas p WHERE {where}', params))
+
+    # Mesmos KPIs de cube.kpis, agregados no banco
+    def kpis(self, ceasa, filtro_dim=None, filtro_subdim=None):
+        resultado = {'total_perguntas': 0, 'soma_pontos': 0, 'media_subdim': 0, 'media_dim': 0, 'media_result': 0}
+        presentes = self.query('SELECT ceasa, metric FROM metricas')
+        if ceasa not in set(presentes['ceasa']):
+            return resultado
+        where, params = _filtro(filtro_dim, filtro_subdim)
+        resultado['total_perguntas'] = self.count(filtro_dim, filtro_subdim)
+        agregados = self.query(
+            f'SELECT c.metric, SUM(c.value) AS soma, COUNT(c.value) AS n FROM celulas c '
+            f'JOIN perguntas p ON p.question_id = c.question_id WHERE c.ceasa = ? AND {where} GROUP BY c.metric',
+            [ceasa] + params,
+        ).set_index('metric')
+        do_ceasa = set(presentes.loc[presentes['ceasa'] == ceasa, 'metric'])
+        na_planilha = set(presentes['metric'])
+
+        def media(metrica):
+            if metrica not in na_planilha:
+                return 0
+            if resultado['total_perguntas'] and metrica not in do_ceasa:
+                return 0
+            n = agregados['n'].get(metrica, 0)
+            return agregados['soma'].get(metrica) / n if n else np.nan
+
+        if PONTOS in na_planilha:
+            resultado['soma_pontos'] = float(agregados['soma'].get(PONTOS, 0) or 0)
+        resultado['media_subdim'] = media(PCT_SUBDIM)
+        resultado['media_dim'] = media(PCT_DIM)
+        resultado['media_result'] = media(RESULTADO)
+        return resultado
+
+    # Soma de uma métrica por Ceasa (comparativo)
+    def totals(self, metrica=PONTOS, ceasas=None):
+        df = self.query('SELECT ceasa, SUM(value) AS soma FROM celulas WHERE metric = ? GROUP BY ceasa', [metrica])
+        somas = df.set_index('ceasa')['soma'].astype(np.float64)
+        if ceasas is not None:
+            somas = somas.reindex(ceasas).fillna(0.0)
+        return somas
+
+    # Dados do gráfico por Subdimensão (ou Dimensão): o banco devolve uma
+    # linha por (Dimensão, Subdimensão) e cube.chart_groups junta as barras
+    def chart_data(self, ceasa, filtro_dim=None, filtro_subdim=None, por='subdimensao'):
+        where, params = _filtro(filtro_dim, filtro_subdim)
+        celulas = self.query(
+            f'SELECT p.dimensao, p.subdimensao, SUM(c.value) AS soma, COUNT(c.value) AS n_soma, '
+            f'COUNT(*) AS perguntas, MIN(p.question_id) AS primeira FROM perguntas p '
+            f'LEFT JOIN celulas c ON c.question_id = p.question_id AND c.ceasa = ? AND c.metric = ? '
+            f'WHERE {where} GROUP BY p.dimensao, p.subdimensao ORDER BY primeira',
+            [ceasa, SOMA_PTS] + params,
+        )
+        return chart_groups(celulas.fillna({'soma': 0.0}), por)
+
+    # Colunas da Tabela Detalhada de um Ceasa, na ordem da planilha
+    def table_columns(self, ceasa):
+        df = self.query('SELECT nivel0, nivel1 FROM colunas ORDER BY ordem')
+        cols = [tuple(c) for c in df.itertuples(index=False, name=None)]
+        return [c for c in COLS_ID if c in cols] + [c for c in cols if c[0] == ceasa]
+
+    # Uma página da Tabela Detalhada; a ordenação e o recorte rodam no banco
+    def table_page(self, ceasa, filtro_dim, filtro_subdim, page, page_size, sort_col=None, ascending=True):
+        where, params = _filtro(filtro_dim, filtro_subdim)
+        join, ordem, join_params = '', 'p.question_id', []
+        direcao = 'ASC' if ascending else 'DESC'
+        if sort_col in ID_COLS:
+            coluna = f'p.{ID_COLS[sort_col]}'
+            ordem = f'{coluna} IS NULL, {coluna} {direcao}, p.question_id'
+        elif sort_col is not None and sort_col[1] in METRICAS:
+            join = 'LEFT JOIN celulas s ON s.question_id = p.question_id AND s.ceasa = ? AND s.metric = ?'
+            join_params = [sort_col[0], sort_col[1]]
+            ordem = f's.value IS NULL, s.value {direcao}, p.question_id'
+        elif sort_col is not None:
+            join = 'LEFT JOIN textos s ON s.question_id = p.question_id AND s.ceasa = ? AND s.coluna = ?'
+            join_params = [sort_col[0], sort_col[1]]
+            ordem = f's.valor IS NULL, s.valor {direcao}, p.question_id'
+        ids = self.query(
+            f'SELECT p.question_id FROM perguntas p {join} WHERE {where} ORDER BY {ordem} LIMIT ? OFFSET ?',
+            join_params + params + [page_size, (page - 1) * page_size],
+        )['question_id'].tolist()
+        return self._rows(ceasa, ids)
+
+    # Linhas completas (identificação + bloco do Ceasa) das perguntas pedidas
+    def _rows(self, ceasa, ids):
+        cols = self.table_columns(ceasa)
+        frame = pd.DataFrame(index=pd.Index(ids, name='question_id'))
+        if ids:
+            marcas = ', '.join('?' * len(ids))
+            perguntas = self.query(f'SELECT * FROM perguntas WHERE question_id IN ({marcas})', ids)
+            perguntas = perguntas.set_index('question_id')
+            for col, nome in ID_COLS.items():
+                frame[col] = perguntas[nome].reindex(ids).to_numpy()
+            celulas = self.query(
+                f'SELECT question_id, metric, value FROM celulas WHERE ceasa = ? AND question_id IN ({marcas})',
+                [ceasa] + ids)
+            for metrica, grupo in celulas.groupby('metric'):
+                frame[(ceasa, metrica)] = grupo.set_index('question_id')['value'].reindex(ids).to_numpy()
+            textos = self.query(
+                f'SELECT question_id, coluna, valor FROM textos WHERE ceasa = ? AND question_id IN ({marcas})',
+                [ceasa] + ids)
+            for coluna, grupo in textos.groupby('coluna'):
+                frame[(ceasa, coluna)] = grupo.set_index('question_id')['valor'].reindex(ids).to_numpy()
+        frame = frame.reindex(columns=cols)
+        frame.columns = pd.MultiIndex.from_tuples(cols)
+        return frame.reset_index(drop=True)
+
+    # Todas as linhas filtradas (exportação), na ordem da planilha
+    def table_rows(self, ceasa, filtro_dim=None, filtro_subdim=None):
+        where, params = _filtro(filtro_dim, filtro_subdim)
+        ids = self.query(f'SELECT question_id FROM perguntas p WHERE {where} ORDER BY question_id',
+                         params)['question_id'].tolist()
+        return self._rows(ceasa, ids)
+
+
+# Bancos abertos por fonte (VersionedStore): quando a fonte muda no disco,
+# o banco novo é gravado em segundo plano e as sessões seguem com o
+# anterior até a troca. Sessões que abrem a mesma fonte ao mesmo tempo
+# esperam uma única abertura.
+class SqlStores(VersionedStore):
+    def __init__(self, backend=None):
+        super().__init__()
+        self.backend = backend
+
+    # Banco da versão atual; só bloqueia na primeira abertura da fonte
+    def get(self, source):
+        return self._current(source)
+
+    def _build(self, source, digest, mtime_ns):
+        return SqlStore.open(source, self.backend, (digest, mtime_ns))
@@ -0,0 +1,61 @@
+import os
+import threading
+
+import numpy as np
+
+# Tamanho da página da Tabela Detalhada; tabelas menores (as matrizes
+# atuais, com ~120 perguntas) vão inteiras, sem paginação
+PAGE_SIZE = int(os.environ.get('DASH_TABLE_PAGE_SIZE', '1000'))
+# Opções do seletor de linhas por página; PAGE_SIZE sempre está entre elas
+# e é o padrão, para o limite e a página terem o mesmo tamanho
+PAGE_SIZES = sorted({100, 250, 500, 1000} | {PAGE_SIZE})
+
+
+# Rótulo curto de uma coluna do multi-index para os controles da tabela
+def column_label(col):
+    return col[0] if str(col[1]).startswith('Unnamed') else f'{col[0]} · {col[1]}'
+
+
+# Ordenação e paginação no servidor sobre as posições filtradas. O rank de
+# cada coluna é calculado uma vez por versão dos dados; ordenar as linhas
+# filtradas vira um argsort de inteiros, e só a página visível é montada.
+class TableIndex:
+    def __init__(self, df):
+        self.df = df
+        self._ranks = {}
+        self._lock = threading.Lock()
+
+    def _rank(self, col, ascending):
+        chave = (col, ascending)
+        rank = self._ranks.get(chave)
+        if rank is None:
+            with self._lock:
+                rank = self._ranks.get(chave)
+                if rank is None:
+                    serie = self.df[col]
+                    try:
+                        # Valores vazios ficam sempre no fim
+                        rank = serie.rank(method='first', ascending=ascending, na_option='bottom')
+                    except TypeError:
+                        # Coluna com tipos misturados: ordena como texto
+                        rank = serie.astype(str).where(serie.notna()).rank(
+                            method='first', ascending=ascending, na_option='bottom')
+                    rank = self._ranks[chave] = rank.to_numpy(dtype=np.int64)
+        return rank
+
+    # Posições das linhas filtradas na ordem pedida (None = todas as linhas)
+    def order(self, positions, sort_col=None, ascending=True):
+        if positions is None:
+            positions = np.arange(len(self.df))
+        if sort_col is None or sort_col not in self.df.columns:
+            return positions
+        rank = self._rank(sort_col, ascending)
+        return positions[np.argsort(rank[positions], kind='stable')]
+
+    # Linhas de uma página: (posições da página, página, número de páginas)
+    def page(self, positions, page, page_size, sort_col=None, ascending=True):
+        ordenadas = self.order(positions, sort_col, ascending)
+        n_pages = max(1, -(-len(ordenadas) // page_size))
+        page = min(max(page, 1), n_pages)
+        inicio = (page - 1) * page_size
+        return ordenadas[inicio:inicio + page_size], page, n_pages
@@ -0,0 +1,33 @@
+import pytest
+
+import loader
+import sqlstore
+from tests.helpers import REPO
+
+
+@pytest.fixture
+def planilha():
+    def caminho(nome):
+        return REPO / f'Matriz_Avaliativa_{nome}.xlsx'
+    return caminho
+
+
+# Fixtures de módulo e processos da leitura paralela (ingest), que não
+# veem o monkeypatch de cada teste, gravam no diretório da sessão; a
+# variável de ambiente vale para os processos filhos
+@pytest.fixture(scope='session', autouse=True)
+def snapshot_sessao(tmp_path_factory):
+    pasta = tmp_path_factory.mktemp('snapshots')
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv('DASH_SNAPSHOT_DIR', str(pasta))
+        mp.setattr(loader, 'SNAPSHOT_DIR', pasta)
+        mp.setattr(sqlstore, 'SQL_DIR', pasta / 'sql')
+        yield pasta
+
+
+# Snapshots e bancos SQL de cada teste ficam no diretório temporário
+@pytest.fixture(autouse=True)
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(loader, 'SNAPSHOT_DIR', tmp_path / '.snapshots')
+    monkeypatch.setattr(sqlstore, 'SQL_DIR', tmp_path / '.snapshots' / 'sql')
+    return tmp_path / '.snapshots'
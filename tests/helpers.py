@@ -0,0 +1,20 @@
+from pathlib import Path
+
+from config import COL_DIMENSAO, COL_SUBDIMENSAO
+
+# Planilhas versionadas no repositório
+REPO = Path(__file__).resolve().parent.parent
+
+
+# Combinações de filtros (Dimensão, Subdimensão) tiradas da própria planilha
+def filtros(df):
+    dims = list(dict.fromkeys(df[COL_DIMENSAO].dropna()))
+    subdims = list(dict.fromkeys(df[COL_SUBDIMENSAO].dropna()))
+    return [
+        (None, None),
+        (dims[:1], None),
+        (None, subdims[1:3]),
+        (dims[1:3], subdims[:6]),
+        # Filtros sem interseção: nenhuma pergunta
+        (dims[:1], subdims[-1:]),
+    ]
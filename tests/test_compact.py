@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import scoring
+from compact import normalize
+from config import AGGREGATE_BLOCKS, GLOBAL_FILE
+from loader import load_source, read_workbook
+from tests.helpers import REPO
+
+
+@pytest.fixture(scope='module')
+def planilha():
+    return scoring.apply(read_workbook(REPO / GLOBAL_FILE))
+
+
+def _bloco_agregado(col):
+    return str(col[0]).strip().upper() in AGGREGATE_BLOCKS
+
+
+# Categorias, float32 e inteiros menores guardam os mesmos valores da
+# planilha em todas as colunas mantidas
+def test_mesmos_valores(planilha):
+    compacto, _ = normalize(planilha)
+    assert any(isinstance(compacto[c].dtype, pd.CategoricalDtype) for c in compacto.columns)
+    assert any(compacto[c].dtype == np.float32 for c in compacto.columns)
+    for col in compacto.columns:
+        original, novo = planilha[col], compacto[col]
+        if pd.api.types.is_float_dtype(novo):
+            np.testing.assert_allclose(novo.to_numpy(np.float64), original.to_numpy(np.float64),
+                                       rtol=1e-6, equal_nan=True, err_msg=str(col))
+        else:
+            pd.testing.assert_series_equal(novo.astype(object), original.astype(object), check_names=False)
+
+
+def test_descarta_colunas_sem_uso(planilha):
+    planilha = planilha.copy()
+    # Coluna sem nome e vazia (formatação sem dados) sai; com valores, fica
+    planilha[('Belem/PA', 'Unnamed: 90_level_1')] = np.nan
+    planilha[('Belem/PA', 'Unnamed: 91_level_1')] = 'obs'
+    compacto, relatorio = normalize(planilha)
+    assert ('Belem/PA', 'Unnamed: 90_level_1') not in compacto.columns
+    assert ('Belem/PA', 'Unnamed: 91_level_1') in compacto.columns
+    descartadas = [c for c in planilha.columns if c not in compacto.columns]
+    assert any(_bloco_agregado(c) for c in planilha.columns)
+    assert not any(_bloco_agregado(c) for c in compacto.columns)
+    # Só saem o bloco de totais e colunas sem nome e sem valores
+    for col in descartadas:
+        assert _bloco_agregado(col) or (str(col[1]).startswith('Unnamed') and planilha[col].isna().all())
+    assert list(compacto.columns) == [c for c in planilha.columns if c not in descartadas]
+    assert relatorio['columns_before'] == planilha.shape[1]
+    assert relatorio['columns_after'] == compacto.shape[1]
+
+
+def test_relatorio_de_memoria():
+    memoria = load_source(REPO / GLOBAL_FILE).attrs['memory']
+    assert memoria['bytes_after'] < memoria['bytes_before']
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import COL_DIMENSAO, COL_SUBDIMENSAO, GLOBAL_FILE, PCT_DIM, PCT_SUBDIM, PONTOS, RESULTADO
+from cube import build_cube, kpis, ranking, soma_por_ceasa
+from loader import load_source
+from tests.helpers import REPO, filtros
+from tidy import ceasas_da_planilha
+
+
+@pytest.fixture(scope='module')
+def consolidada():
+    return load_source(REPO / GLOBAL_FILE)
+
+
+# KPIs como os dashboards originais calculavam: máscara dos filtros sobre
+# as perguntas, .sum() dos Pontos e .mean() das colunas de percentual
+def kpis_originais(df, ceasa, filtro_dim, filtro_subdim):
+    mask = pd.Series([True] * len(df), index=df.index)
+    if filtro_dim:
+        mask &= df[COL_DIMENSAO].isin(filtro_dim)
+    if filtro_subdim:
+        mask &= df[COL_SUBDIMENSAO].isin(filtro_subdim)
+    df_filt = df[mask]
+
+    def coluna(metrica, agregado):
+        col = (ceasa, metrica)
+        return getattr(df_filt[col].astype(np.float64), agregado)() if col in df_filt.columns else 0
+
+    return {
+        'total_perguntas': len(df_filt),
+        'soma_pontos': coluna(PONTOS, 'sum'),
+        'media_subdim': coluna(PCT_SUBDIM, 'mean'),
+        'media_dim': coluna(PCT_DIM, 'mean'),
+        'media_result': coluna(RESULTADO, 'mean'),
+    }
+
+
+def test_kpis_do_cubo_iguais_aos_originais(consolidada):
+    cube = build_cube(consolidada)
+    for ceasa in ceasas_da_planilha(consolidada):
+        for filtro_dim, filtro_subdim in filtros(consolidada):
+            esperado = kpis_originais(consolidada, ceasa, filtro_dim, filtro_subdim)
+            obtido = kpis(cube, ceasa, filtro_dim, filtro_subdim)
+            assert obtido['total_perguntas'] == esperado['total_perguntas']
+            for chave in ['soma_pontos', 'media_subdim', 'media_dim', 'media_result']:
+                np.testing.assert_allclose(obtido[chave], esperado[chave], rtol=1e-6, equal_nan=True,
+                                           err_msg=f'{ceasa} {chave} {filtro_dim} {filtro_subdim}')
+
+
+def test_soma_por_ceasa(consolidada):
+    cube = build_cube(consolidada)
+    ceasas = ceasas_da_planilha(consolidada)
+    esperado = pd.Series({c: consolidada[(c, PONTOS)].astype(np.float64).sum() for c in ceasas})
+    pd.testing.assert_series_equal(soma_por_ceasa(cube, PONTOS, ceasas), esperado, check_names=False, rtol=1e-6)
+
+
+def test_ceasa_sem_bloco(consolidada):
+    assert kpis(build_cube(consolidada), 'Inexistente/XX') == {
+        'total_perguntas': 0, 'soma_pontos': 0, 'media_subdim': 0, 'media_dim': 0, 'media_result': 0}
+
+
+# Ranking do comparativo: as n maiores somas e os Ceasas buscados, mais a
+# barra 'Outros' com o resto; a soma das barras é sempre o total
+@pytest.mark.parametrize('n', [0, 1, 3])
+def test_ranking_com_outros(consolidada, n):
+    somas = soma_por_ceasa(build_cube(consolidada), PONTOS)
+    ordenado = somas.sort_values(ascending=False, kind='stable')
+    fixo = ordenado.index[-1]
+    barras, outros = ranking(somas, n, [fixo])
+    assert outros == f'Outros ({len(somas) - n - 1})'
+    assert list(barras.index) == list(ordenado.index[:n]) + [fixo, outros]
+    assert barras.sum() == pytest.approx(somas.sum())
+    assert barras[outros] == pytest.approx(ordenado.iloc[n:-1].sum())
+
+
+def test_ranking_sem_outros(consolidada):
+    somas = soma_por_ceasa(build_cube(consolidada), PONTOS)
+    for n in [len(somas), len(somas) + 5]:
+        barras, outros = ranking(somas, n)
+        assert outros is None
+        assert list(barras.index) == list(somas.sort_values(ascending=False, kind='stable').index)
+
+
+def test_grafico_do_comparativo(consolidada):
+    from views import fig_comparativo
+
+    somas = soma_por_ceasa(build_cube(consolidada), PONTOS)
+    barra = fig_comparativo(somas, n=2, fixos=[somas.idxmin()]).data
+    assert len(barra) == 1
+    assert len(barra[0].x) == 4 and barra[0].x[-1].startswith('Outros')
+    assert sum(barra[0].y) == pytest.approx(somas.sum())
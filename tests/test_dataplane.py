@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+
+import dataplane
+import scoring
+from config import COL_DIMENSAO, COL_SUBDIMENSAO, GLOBAL_FILE
+from dataplane import open_mapped, plane_file, publish
+from loader import load_source, source_fingerprint
+from tests.helpers import REPO
+
+
+@pytest.fixture(autouse=True)
+def plane_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(dataplane, 'PLANE_DIR', tmp_path / 'plane')
+    return tmp_path / 'plane'
+
+
+# O frame mapeado é o mesmo da carga normal: multi-index, categorias (que
+# voltam dos dicionários do Arrow), float32, NaN nas colunas de
+# identificação e o relatório de memória
+@pytest.mark.parametrize('fonte', [REPO / GLOBAL_FILE, REPO / 'Matriz_Avaliativa_Belem-PA.xlsx', REPO])
+def test_frame_mapeado_igual_a_carga(fonte):
+    df = load_source(fonte)
+    digest, _ = source_fingerprint(fonte)
+    mapeado = open_mapped(publish(fonte, df, digest))
+    pd.testing.assert_frame_equal(mapeado, df)
+    assert mapeado.attrs['memory'] == df.attrs['memory']
+
+
+# Perguntas antes do primeiro bloco ficam sem Dimensão/Subdimensão (NaN na
+# coluna categórica); as planilhas do repositório não têm esse caso
+def test_identificacao_vazia():
+    fonte = REPO / 'Matriz_Avaliativa_Belem-PA.xlsx'
+    df = load_source(fonte).copy()
+    for col in [COL_DIMENSAO, COL_SUBDIMENSAO]:
+        df.loc[:2, col] = None
+    assert isinstance(df[COL_DIMENSAO].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(open_mapped(publish(fonte, df, 'c' * 64)), df)
+
+
+def test_publicacao_remove_versoes_anteriores(plane_dir, monkeypatch):
+    fonte = REPO / 'Matriz_Avaliativa_Belem-PA.xlsx'
+    df = load_source(fonte)
+    antigo = publish(fonte, df, 'a' * 64)
+    monkeypatch.setattr(scoring, 'RECOMPUTE', 'always')
+    outro_modo = publish(fonte, df, 'a' * 64)
+    assert outro_modo != antigo
+    monkeypatch.setattr(scoring, 'RECOMPUTE', 'missing')
+    novo = publish(fonte, df, 'b' * 64)
+    assert novo == plane_file(fonte, 'b' * 64)
+    # Só a versão anterior do mesmo modo é removida
+    assert sorted(plane_dir.glob('*.arrow')) == sorted([novo, outro_modo])
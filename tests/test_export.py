@@ -0,0 +1,66 @@
+import io
+
+import pandas as pd
+import pytest
+
+import export
+from config import COL_DIMENSAO, COLS_ID
+from export import FORMATS, export_frame
+from filters import FilterIndex
+from loader import load_source
+from tests.helpers import REPO
+
+LEITORES = {'csv': pd.read_csv, 'parquet': pd.read_parquet, 'xlsx': pd.read_excel}
+
+
+# Colunas numéricas como float64 (o float32 volta do CSV/XLSX como float64)
+# e as demais como texto, com vazio no lugar de NaN
+def _comparavel(frame):
+    colunas = {}
+    for col in frame.columns:
+        numeros = pd.to_numeric(frame[col], errors='coerce')
+        if numeros.notna().sum() == frame[col].notna().sum():
+            colunas[col] = numeros.astype('float64')
+        else:
+            colunas[col] = frame[col].astype(object).where(frame[col].notna(), '').astype(str)
+    return pd.DataFrame(colunas)
+
+
+@pytest.fixture(scope='module')
+def recorte():
+    df = load_source(REPO / 'Matriz_Avaliativa_Belem-PA.xlsx')
+    indice = FilterIndex(df)
+    posicoes = indice.positions({COL_DIMENSAO: indice.values(COL_DIMENSAO)[:1]})
+    cols = COLS_ID + [c for c in df.columns if c[0] == 'Belem/PA']
+    return df, posicoes, cols
+
+
+# O download_button só aceita str, bytes ou arquivos que ele reconhece; o
+# arquivo gerado volta com as mesmas linhas e colunas do recorte
+@pytest.mark.parametrize('fmt', list(FORMATS))
+def test_exporta_bytes_legiveis(recorte, fmt):
+    df, posicoes, cols = recorte
+    dados = export.export(df, posicoes, cols, fmt)
+    assert isinstance(dados, bytes)
+    esperado = export_frame(df, posicoes, cols)
+    lido = LEITORES[fmt](io.BytesIO(dados))
+    assert 0 < len(lido) < len(df)
+    assert list(lido.columns) == list(esperado.columns)
+    pd.testing.assert_frame_equal(_comparavel(lido), _comparavel(esperado), rtol=1e-6)
+
+
+# Um writer que falha devolve a vaga: as exportações seguintes não travam
+def test_falha_libera_vaga(recorte, monkeypatch):
+    df, posicoes, cols = recorte
+
+    def quebrado(frame, out):
+        raise OSError('disco cheio')
+
+    monkeypatch.setitem(export._WRITERS, 'csv', quebrado)
+    for _ in range(export.MAX_EXPORTS + 1):
+        with pytest.raises(OSError):
+            export.export(df, posicoes, cols, 'csv')
+    for _ in range(export.MAX_EXPORTS):
+        assert export._slots.acquire(blocking=False)
+    for _ in range(export.MAX_EXPORTS):
+        export._slots.release()
@@ -0,0 +1,61 @@
+from figcache import FigureCache, figure_key
+
+
+# Figura com JSON de tamanho conhecido (o custo da entrada no cache)
+class Figura:
+    def __init__(self, tamanho):
+        self.tamanho = tamanho
+
+    def to_json(self):
+        return 'x' * self.tamanho
+
+
+def _construir(cache, chave, tamanho, construidas):
+    def builder():
+        construidas.append(chave)
+        return Figura(tamanho)
+    return cache.get_or_build(chave, builder)
+
+
+def test_remove_as_mais_antigas_acima_do_orcamento():
+    cache = FigureCache(max_bytes=300)
+    construidas = []
+    for chave in 'abc':
+        _construir(cache, chave, 100, construidas)
+    # 'a' passa a ser a mais recente; 'b' é a mais antiga
+    _construir(cache, 'a', 100, construidas)
+    _construir(cache, 'd', 150, construidas)
+    assert cache.stats()['bytes'] == 250
+    assert cache.evictions == 2
+    _construir(cache, 'a', 100, construidas)
+    _construir(cache, 'd', 150, construidas)
+    _construir(cache, 'b', 100, construidas)
+    assert construidas == ['a', 'b', 'c', 'd', 'b']
+
+
+def test_figura_maior_que_o_orcamento_nao_fica():
+    cache = FigureCache(max_bytes=100)
+    construidas = []
+    _construir(cache, 'pequena', 60, construidas)
+    grande = _construir(cache, 'grande', 500, construidas)
+    assert grande.tamanho == 500
+    _construir(cache, 'grande', 500, construidas)
+    assert construidas == ['pequena', 'grande', 'grande']
+    assert cache.stats()['entries'] == 1 and cache.bytes == 60
+
+
+def test_chave_ignora_ordem_dos_filtros():
+    assert figure_key('subdim', 'Belem/PA', {'dim': ['B', 'A'], 'subdim': ['Y', 'X']}, 'v1') == \
+        figure_key('subdim', 'Belem/PA', {'subdim': ['X', 'Y'], 'dim': ['A', 'B']}, 'v1')
+    # Filtro vazio é o mesmo que filtro ausente
+    assert figure_key('subdim', 'Belem/PA', {'dim': []}, 'v1') == figure_key('subdim', 'Belem/PA', {}, 'v1')
+
+
+def test_versao_nova_dos_dados_nao_usa_o_cache():
+    cache = FigureCache()
+    construidas = []
+    _construir(cache, figure_key('subdim', 'Belem/PA', {}, 'v1'), 10, construidas)
+    _construir(cache, figure_key('subdim', 'Belem/PA', {}, 'v1'), 10, construidas)
+    _construir(cache, figure_key('subdim', 'Belem/PA', {}, 'v2'), 10, construidas)
+    assert len(construidas) == 2
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 2
@@ -0,0 +1,103 @@
+import json
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pytest
+
+from config import COL_PERGUNTA, PONTOS
+from history import CHAVE, HistoryStore, celulas
+from loader import load_source
+
+
+# Cópia da planilha do Belém com Pontos alterados: {linha da planilha: valor}
+# (None apaga a célula)
+def copia(planilha, destino, pontos=None):
+    wb = openpyxl.load_workbook(planilha('Belem-PA'))
+    ws = wb.active
+    coluna = next(c.column for c in ws[2] if c.value == PONTOS)
+    for linha, valor in (pontos or {}).items():
+        ws.cell(row=linha, column=coluna).value = valor
+    wb.save(destino)
+    return destino
+
+
+def _estado(df):
+    return df.set_index(CHAVE)['value'].sort_index()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(tmp_path / 'historico')
+
+
+def test_ingest_grava_so_as_mudancas(planilha, tmp_path, store):
+    r1 = copia(planilha, tmp_path / 'r1.xlsx')
+    total = store.ingest(r1, '2025-1')
+    assert total == len(celulas(load_source(r1)))
+    # Mesmo arquivo na mesma rodada: nada a registrar
+    assert store.ingest(r1, '2025-1') is None
+
+    original = load_source(r1)
+    pontos = original[('Belem/PA', PONTOS)]
+    # Linha 3 da planilha = primeira pergunta; linha 4 = segunda
+    novo = 0 if pontos.iloc[0] else 2
+    r2 = copia(planilha, tmp_path / 'r2.xlsx', {3: novo, 4: None})
+    mudancas = store.ingest(r2, '2025-2')
+    assert 2 <= mudancas < total
+
+    gravadas = pd.read_parquet(store.root / store.manifest()['ingests'][-1]['cells_file'])
+    pontos_gravados = gravadas[gravadas['metric'] == PONTOS]
+    alterada = pontos_gravados[pontos_gravados['value'].notna()]
+    assert alterada['value'].tolist() == [novo]
+    # A célula apagada entra no histórico com valor vazio
+    removida = pontos_gravados[pontos_gravados['value'].isna()]
+    assert len(removida) == 1
+    assert removida['pergunta'].iloc[0] == str(original[COL_PERGUNTA].iloc[1])
+
+    # O estado de cada rodada é o da planilha registrada nela
+    pd.testing.assert_series_equal(_estado(store.state()), _estado(celulas(load_source(r2))), check_dtype=False)
+    pd.testing.assert_series_equal(_estado(store.state(ate='2025-1')), _estado(celulas(original)),
+                                   check_dtype=False)
+    assert store.rounds() == ['2025-1', '2025-2']
+
+
+def test_rollups_e_tendencia(planilha, tmp_path, store):
+    store.ingest(copia(planilha, tmp_path / 'r1.xlsx'), '2025-1')
+    store.ingest(copia(planilha, tmp_path / 'r2.xlsx', {3: 2, 4: 2, 5: 2}), '2025-2')
+    total, subdim = store.trend('Belem/PA')
+    assert total['round'].astype(str).tolist() == ['2025-1', '2025-2']
+    assert total['resultado'].is_monotonic_increasing
+    assert set(subdim['round'].astype(str)) == {'2025-1', '2025-2'}
+    assert np.isfinite(subdim['pontos']).all()
+
+
+# O estado mais recente fica materializado: uma ingestão lê só ele, não as
+# mudanças das rodadas anteriores, e o resultado é o mesmo de reaplicá-las
+def test_ingest_usa_o_estado_materializado(planilha, tmp_path, store, monkeypatch):
+    store.ingest(copia(planilha, tmp_path / 'r1.xlsx'), '2025-1')
+    store.ingest(copia(planilha, tmp_path / 'r2.xlsx', {3: 0, 4: None}), '2025-2')
+    assert [p.name for p in store.root.glob('state-*.parquet')] == [store.manifest()['state_file']]
+    pd.testing.assert_frame_equal(store.state(), store._replay(store.manifest()['ingests']), check_dtype=False)
+
+    def sem_releitura(ingests):
+        raise AssertionError(f'reaplicou {len(ingests)} ingestões')
+
+    monkeypatch.setattr(store, '_replay', sem_releitura)
+    r3 = copia(planilha, tmp_path / 'r3.xlsx', {3: 1, 4: 1})
+    assert store.ingest(r3, '2025-3') >= 2
+    pd.testing.assert_series_equal(_estado(store.state()), _estado(celulas(load_source(r3))), check_dtype=False)
+    assert len(list(store.root.glob('state-*.parquet'))) == 1
+
+
+# Histórico gravado antes do estado materializado: reaplica as mudanças
+def test_historico_sem_estado_materializado(planilha, tmp_path, store):
+    r1 = copia(planilha, tmp_path / 'r1.xlsx')
+    store.ingest(r1, '2025-1')
+    manifest = store.manifest()
+    (store.root / manifest.pop('state_file')).unlink()
+    store._manifest_path.write_text(json.dumps(manifest), encoding='utf-8')
+    pd.testing.assert_series_equal(_estado(store.state()), _estado(celulas(load_source(r1))), check_dtype=False)
+    r2 = copia(planilha, tmp_path / 'r2.xlsx', {3: 0})
+    assert store.ingest(r2, '2025-2') >= 1
+    pd.testing.assert_series_equal(_estado(store.state()), _estado(celulas(load_source(r2))), check_dtype=False)
@@ -0,0 +1,22 @@
+import pandas as pd
+
+from config import AGGREGATE_BLOCKS, CONSOLIDATED_FILES, GLOBAL_FILE
+from ingest import discover, ingest_directory
+from loader import read_workbook
+from tests.helpers import REPO
+
+
+def test_discover_ignora_consolidadas():
+    nomes = {p.name for p in discover(REPO)}
+    assert nomes and not nomes & set(CONSOLIDATED_FILES)
+
+
+# As planilhas por Ceasa juntas formam a planilha consolidada, sem o bloco
+# GLOBAL de totais
+def test_juncao_igual_a_consolidada():
+    juntas = ingest_directory(REPO)
+    consolidada = read_workbook(REPO / GLOBAL_FILE)
+    consolidada = consolidada[[c for c in consolidada.columns if c[0].strip() not in AGGREGATE_BLOCKS]]
+    assert list(juntas.columns) == list(consolidada.columns)
+    pd.testing.assert_frame_equal(juntas.reset_index(drop=True), consolidada.reset_index(drop=True),
+                                  check_dtype=False)
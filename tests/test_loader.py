@@ -0,0 +1,83 @@
+import os
+import shutil
+
+import openpyxl
+import pandas as pd
+
+import loader
+from loader import DataStore
+
+
+def _gravar(path, texto, mtime_ns):
+    path.write_text(texto)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+# Recarga de uma fonte ilegível: mantém a versão anterior, guarda o erro e
+# não relê a mesma versão a cada rerun
+def test_recarga_com_falha_nao_repete_leitura(tmp_path):
+    leituras = []
+
+    def loader(path):
+        texto = open(path).read()
+        leituras.append(texto)
+        if texto == 'ruim':
+            raise ValueError('planilha ilegível')
+        return pd.DataFrame({'versao': [texto]})
+
+    fonte = tmp_path / 'fonte.txt'
+    _gravar(fonte, 'v1', 1_000_000_000)
+    store = DataStore(loader=loader)
+    assert store.get(fonte)['versao'][0] == 'v1'
+
+    _gravar(fonte, 'ruim', 2_000_000_000)
+    store.refresh(fonte, wait=True)
+    assert store.get(fonte)['versao'][0] == 'v1'
+    assert 'planilha ilegível' in store.reload_error(fonte)
+    for _ in range(3):
+        store.dataset(fonte)
+    store.refresh(fonte, wait=True)
+    # Só mudou o mtime, o conteúdo é o mesmo que falhou
+    _gravar(fonte, 'ruim', 3_000_000_000)
+    store.refresh(fonte, wait=True)
+    assert leituras == ['v1', 'ruim']
+
+    _gravar(fonte, 'v2', 4_000_000_000)
+    store.refresh(fonte, wait=True)
+    assert store.get(fonte)['versao'][0] == 'v2'
+    assert store.reload_error(fonte) is None
+
+
+# Snapshot Parquet: a segunda carga vem do snapshot, com o mesmo cabeçalho
+# em dois níveis; mtime novo só regrava o meta e conteúdo novo troca o
+# snapshot
+def test_snapshot_da_planilha(planilha, tmp_path, monkeypatch, snapshot_dir):
+    fonte = tmp_path / 'Matriz_Avaliativa_Belem-PA.xlsx'
+    shutil.copy(planilha('Belem-PA'), fonte)
+    leituras = []
+    ler = loader.read_workbook
+    monkeypatch.setattr(loader, 'read_workbook', lambda path: leituras.append(path) or ler(path))
+
+    primeira = loader.load_workbook(fonte)
+    snapshots = list(snapshot_dir.glob('*.parquet'))
+    assert len(snapshots) == 1
+    segunda = loader.load_workbook(fonte)
+    assert len(leituras) == 1
+    assert isinstance(segunda.columns, pd.MultiIndex)
+    pd.testing.assert_frame_equal(segunda, primeira)
+
+    snapshot_ns = snapshots[0].stat().st_mtime_ns
+    os.utime(fonte, ns=(5_000_000_000, 5_000_000_000))
+    pd.testing.assert_frame_equal(loader.load_workbook(fonte), primeira)
+    assert len(leituras) == 1
+    assert snapshots[0].stat().st_mtime_ns == snapshot_ns
+    assert loader._read_meta(fonte)['mtime_ns'] == 5_000_000_000
+
+    wb = openpyxl.load_workbook(fonte)
+    wb.worksheets[0].cell(row=3, column=6).value = 99
+    wb.save(fonte)
+    alterada = loader.load_workbook(fonte)
+    assert len(leituras) == 2
+    assert alterada.iloc[0, 5] == 99
+    novos = list(snapshot_dir.glob('*.parquet'))
+    assert len(novos) == 1 and novos != snapshots
@@ -0,0 +1,72 @@
+import numpy as np
+import openpyxl
+import pytest
+
+import scoring
+from config import PCT_DIM, PCT_SUBDIM, RESULTADO, SOMA_PTS
+from loader import load_source, read_workbook
+from tests.helpers import REPO
+from tidy import QuestionMatrix
+
+DERIVADAS = [SOMA_PTS, PCT_SUBDIM, PCT_DIM, RESULTADO]
+PLANILHAS = sorted(p.name for p in REPO.glob('Matriz_Avaliativa_*.xlsx'))
+
+
+# O recálculo reproduz as fórmulas da planilha em todas as células de
+# início de bloco (a única divergência conhecida é a do Mais Nutrição)
+@pytest.mark.parametrize('ceasa, nome', [('Belem/PA', 'Belem-PA'), ('CEAGESP/SP', 'CEAGESP-SP'),
+                                         ('Curitiba/PR', 'Curitiba-PR'), ('PRODAL/MG', 'PRODAL-MG'),
+                                         ('São Luís/MA', 'São-Luis-MA')])
+def test_recompute_igual_as_formulas(planilha, ceasa, nome):
+    df = read_workbook(planilha(nome))
+    matriz = QuestionMatrix(df)
+    ceasas, derivadas = scoring.recompute(df, matriz)
+    j = ceasas.index(ceasa)
+    for metrica in DERIVADAS:
+        gravado = matriz.values[metrica][:, j]
+        np.testing.assert_allclose(derivadas[metrica][:, j], gravado, rtol=scoring.RTOL, atol=scoring.ATOL,
+                                   equal_nan=True, err_msg=metrica)
+
+
+# Nas planilhas do repositório há exatamente uma célula divergente: o
+# % Total da Dimensão 4 do Mais Nutrição/CE
+@pytest.mark.parametrize('nome', PLANILHAS)
+def test_mismatches_nas_planilhas_do_repositorio(nome):
+    diferencas = scoring.mismatches(load_source(REPO / nome))
+    if 'Mais-Nutrição' not in nome and nome not in ('Matriz_Avaliativa_Ceasas-Dashboard.xlsx',
+                                                    'Matriz_Avaliativa_GERAL.xlsx'):
+        assert diferencas.empty
+        return
+    assert len(diferencas) == 1
+    celula = diferencas.iloc[0]
+    assert (celula['ceasa'], celula['metrica'], celula['linha']) == ('Mais Nutrição/CE', PCT_DIM, 86)
+    assert celula['dimensao'] == 'Dimensão 4'
+    assert celula['planilha'] == pytest.approx(2 / 7, rel=1e-5)
+    assert celula['recalculado'] == pytest.approx(6 / 7, rel=1e-5)
+
+
+# Planilha salva por uma ferramenta que não recalcula as fórmulas: as
+# células de fórmula ficam sem valor, só os valores literais sobram
+def test_apply_preenche_celulas_sem_valor_salvo(planilha, tmp_path):
+    original = read_workbook(planilha('Belem-PA'))
+    salva = tmp_path / 'sem_valores.xlsx'
+    openpyxl.load_workbook(planilha('Belem-PA')).save(salva)
+    df = read_workbook(salva)
+    ceasa = 'Belem/PA'
+    assert df[(ceasa, SOMA_PTS)].notna().sum() < original[(ceasa, SOMA_PTS)].notna().sum()
+
+    resultado = scoring.apply(df, 'missing')
+    assert list(resultado.columns) == list(df.columns)
+    for metrica in DERIVADAS:
+        np.testing.assert_allclose(resultado[(ceasa, metrica)].to_numpy(float),
+                                   original[(ceasa, metrica)].to_numpy(float), rtol=1e-5, equal_nan=True)
+    assert scoring.mismatches(resultado).empty
+
+
+def test_apply_missing_mantem_valores_gravados(planilha):
+    df = read_workbook(planilha('Belem-PA'))
+    ceasa = 'Belem/PA'
+    df[(ceasa, SOMA_PTS)] = df[(ceasa, SOMA_PTS)].where(df[(ceasa, SOMA_PTS)].isna(), -1.0)
+    resultado = scoring.apply(df, 'missing')
+    gravado = df[(ceasa, SOMA_PTS)].notna()
+    assert (resultado.loc[gravado, (ceasa, SOMA_PTS)] == -1.0).all()
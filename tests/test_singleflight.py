@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight, file_lock
+
+N = 8
+
+
+def _esperar(condicao, limite=5):
+    fim = time.monotonic() + limite
+    while not condicao():
+        assert time.monotonic() < fim
+        time.sleep(0.005)
+
+
+# Dispara N chamadas com a mesma chave enquanto a primeira está em andamento
+def _concorrentes(voos, fn, kind='teste'):
+    resultados = [None] * N
+
+    def chamar(i):
+        try:
+            resultados[i] = voos.do('chave', fn, kind=kind)
+        except Exception as exc:
+            resultados[i] = exc
+
+    threads = [threading.Thread(target=chamar, args=(i,)) for i in range(N)]
+    for thread in threads:
+        thread.start()
+    return threads, resultados
+
+
+def test_chamadas_simultaneas_executam_uma_vez():
+    voos = SingleFlight()
+    liberar = threading.Event()
+    execucoes = []
+
+    def fn():
+        execucoes.append(1)
+        assert liberar.wait(5)
+        return object()
+
+    threads, resultados = _concorrentes(voos, fn)
+    _esperar(lambda: voos.stats().get('teste', {}).get('calls') == N)
+    liberar.set()
+    for thread in threads:
+        thread.join()
+    assert len(execucoes) == 1
+    assert all(r is resultados[0] for r in resultados)
+    assert voos.stats()['teste'] == {'calls': N, 'leaders': 1, 'coalesced': N - 1, 'errors': 0}
+    assert voos.in_flight() == 0
+
+
+def test_erro_chega_a_todas_as_chamadas():
+    voos = SingleFlight()
+    liberar = threading.Event()
+
+    def fn():
+        assert liberar.wait(5)
+        raise ValueError('falhou')
+
+    threads, resultados = _concorrentes(voos, fn)
+    _esperar(lambda: voos.stats().get('teste', {}).get('calls') == N)
+    liberar.set()
+    for thread in threads:
+        thread.join()
+    assert all(isinstance(r, ValueError) for r in resultados)
+    assert len({id(r) for r in resultados}) == 1
+    assert voos.stats()['teste']['errors'] == 1
+    # Terminada a chamada a chave é liberada: a próxima executa de novo
+    assert voos.do('chave', lambda: 42, kind='teste') == 42
+    assert voos.stats()['teste']['leaders'] == 2
+
+
+def test_chaves_diferentes_nao_coalescem():
+    voos = SingleFlight()
+    assert [voos.do(i, lambda i=i: i * 2) for i in range(3)] == [0, 2, 4]
+    assert voos.stats()['default']['coalesced'] == 0
+
+
+def test_file_lock_exclusivo(tmp_path):
+    pytest.importorskip('fcntl')
+    caminho = tmp_path / 'locks' / 'x.lock'
+    dentro = []
+    maximo = []
+
+    def trabalho():
+        with file_lock(caminho):
+            dentro.append(1)
+            maximo.append(len(dentro))
+            time.sleep(0.01)
+            dentro.pop()
+
+    threads = [threading.Thread(target=trabalho) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(maximo) == 1
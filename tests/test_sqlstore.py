@@ -0,0 +1,122 @@
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sqlstore
+from config import COL_DIMENSAO, COL_SUBDIMENSAO, COLS_ID, GLOBAL_FILE, PONTOS
+from cube import build_cube, chart_data, kpis
+from filters import FilterIndex, select
+from loader import load_source
+from sqlstore import SqlStore, SqlStores
+from table import TableIndex
+from tests.helpers import REPO, filtros
+from tidy import QuestionMatrix, ceasas_da_planilha
+
+
+# Fonte alterada: o banco novo é gravado em segundo plano e get() segue
+# devolvendo o anterior até a troca
+def test_reabertura_em_segundo_plano(planilha, tmp_path, monkeypatch):
+    fonte = tmp_path / 'fonte.xlsx'
+    shutil.copy(planilha('Belem-PA'), fonte)
+    stores = SqlStores('sqlite')
+    anterior = stores.get(str(fonte))
+    assert anterior.ceasas() == ['Belem/PA']
+
+    liberar = threading.Event()
+    carregar = sqlstore.load_source
+
+    def load_lento(path):
+        assert liberar.wait(10)
+        return carregar(path)
+
+    monkeypatch.setattr(sqlstore, 'load_source', load_lento)
+    shutil.copy(planilha('CEAGESP-SP'), fonte)
+    assert stores.get(str(fonte)) is anterior
+    assert stores.get(str(fonte)).ceasas() == ['Belem/PA']
+
+    liberar.set()
+    stores.refresh(str(fonte), wait=True)
+    assert stores.get(str(fonte)).ceasas() == ['CEAGESP/SP']
+    # A versão anterior continua no disco para quem ainda a usa
+    assert len(list(sqlstore.SQL_DIR.glob('fonte-*.sqlite'))) == 2
+
+
+def test_reabertura_com_falha_mantem_banco(planilha, tmp_path):
+    fonte = tmp_path / 'fonte.xlsx'
+    shutil.copy(planilha('Belem-PA'), fonte)
+    stores = SqlStores('sqlite')
+    anterior = stores.get(str(fonte))
+    fonte.write_bytes(b'planilha incompleta')
+    stores.refresh(str(fonte), wait=True)
+    assert stores.get(str(fonte)) is anterior
+    assert stores.reload_error(str(fonte))
+
+
+@pytest.fixture(scope='module')
+def consolidada():
+    return load_source(REPO / GLOBAL_FILE)
+
+
+@pytest.fixture(scope='module')
+def banco():
+    return SqlStore.open(str(REPO / GLOBAL_FILE), 'sqlite')
+
+
+# Consultas do backend SQL devolvem o mesmo que o caminho pandas
+# (cubo, matriz e índices) na planilha consolidada
+def test_kpis_iguais_ao_cubo(consolidada, banco):
+    cube = build_cube(consolidada)
+    for ceasa in ceasas_da_planilha(consolidada):
+        for filtro_dim, filtro_subdim in filtros(consolidada):
+            esperado = kpis(cube, ceasa, filtro_dim, filtro_subdim)
+            obtido = banco.kpis(ceasa, filtro_dim, filtro_subdim)
+            assert obtido['total_perguntas'] == esperado['total_perguntas']
+            for chave in ['soma_pontos', 'media_subdim', 'media_dim', 'media_result']:
+                np.testing.assert_allclose(obtido[chave], esperado[chave], rtol=1e-6, equal_nan=True,
+                                           err_msg=f'{ceasa} {chave} {filtro_dim} {filtro_subdim}')
+
+
+def test_totais_iguais_a_matriz(consolidada, banco):
+    esperado = QuestionMatrix(consolidada).present_totals(PONTOS)
+    obtido = banco.totals(PONTOS, banco.ceasas(PONTOS))
+    pd.testing.assert_series_equal(obtido, esperado, check_names=False, check_index_type=False, rtol=1e-6)
+
+
+def test_grafico_igual_ao_cubo(consolidada, banco):
+    cube = build_cube(consolidada)
+    for ceasa in ceasas_da_planilha(consolidada):
+        for filtro_dim, filtro_subdim in filtros(consolidada):
+            for por in ['subdimensao', 'dimensao']:
+                pd.testing.assert_frame_equal(
+                    banco.chart_data(ceasa, filtro_dim, filtro_subdim, por).reset_index(drop=True),
+                    chart_data(cube, ceasa, filtro_dim, filtro_subdim, por).reset_index(drop=True),
+                    check_dtype=False, rtol=1e-6)
+
+
+def _comparavel(frame):
+    return frame.astype(object).where(frame.notna(), None).reset_index(drop=True)
+
+
+def test_tabela_igual_ao_pandas(consolidada, banco):
+    indice, tabela = FilterIndex(consolidada), TableIndex(consolidada)
+    ceasa = ceasas_da_planilha(consolidada)[0]
+    cols = COLS_ID + [c for c in consolidada.columns if c[0] == ceasa]
+    assert banco.table_columns(ceasa) == cols
+    assert banco.values(COL_DIMENSAO) == indice.values(COL_DIMENSAO)
+    assert banco.values(COL_SUBDIMENSAO) == indice.values(COL_SUBDIMENSAO)
+    for filtro_dim, filtro_subdim in filtros(consolidada):
+        posicoes = indice.positions({COL_DIMENSAO: filtro_dim, COL_SUBDIMENSAO: filtro_subdim})
+        total = len(consolidada) if posicoes is None else len(posicoes)
+        assert banco.count(filtro_dim, filtro_subdim) == total
+        pd.testing.assert_frame_equal(_comparavel(banco.table_rows(ceasa, filtro_dim, filtro_subdim)),
+                                      _comparavel(select(consolidada, posicoes, cols)), check_dtype=False)
+        for ordem, crescente in [(None, True), (COL_SUBDIMENSAO, False), ((ceasa, PONTOS), False)]:
+            for pagina in [1, 2]:
+                # A página já chega limitada ao total (_controles_tabela)
+                linhas, pagina, _ = tabela.page(posicoes, pagina, 25, ordem, crescente)
+                pd.testing.assert_frame_equal(
+                    _comparavel(banco.table_page(ceasa, filtro_dim, filtro_subdim, pagina, 25, ordem, crescente)),
+                    _comparavel(select(consolidada, linhas, cols)), check_dtype=False)
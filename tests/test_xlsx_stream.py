@@ -0,0 +1,15 @@
+import pandas as pd
+import pytest
+
+from loader import read_workbook
+from tests.helpers import REPO
+
+PLANILHAS = sorted(p.name for p in REPO.glob('Matriz_Avaliativa_*.xlsx'))
+
+
+# O leitor linha a linha monta o mesmo DataFrame que pd.read_excel
+# (cabeçalho em dois níveis, tipos e células vazias)
+@pytest.mark.parametrize('nome', PLANILHAS)
+def test_stream_igual_read_excel(nome):
+    pd.testing.assert_frame_equal(read_workbook(REPO / nome, reader='stream'),
+                                  read_workbook(REPO / nome, reader='pandas'))
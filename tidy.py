@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+from config import COL_DIMENSAO, COL_SUBDIMENSAO, PCT_DIM, PCT_SUBDIM, PONTOS, RESULTADO, SOMA_PTS
+
+METRICAS = [PONTOS, SOMA_PTS, PCT_SUBDIM, PCT_DIM, RESULTADO]
+
+
+# Ceasas da planilha: nomes do nível 0 que têm ao menos uma métrica
+def ceasas_da_planilha(df):
+    nomes = []
+    for ceasa, metrica in df.columns:
+        if metrica in METRICAS and ceasa not in nomes:
+            nomes.append(ceasa)
+    return nomes
+
+
+def _coluna_ids(df, col):
+    if col in df.columns:
+        return df[col].reset_index(drop=True)
+    return pd.Series(np.nan, index=range(len(df)))
+
+
+# Matriz densa pergunta × Ceasa de cada métrica (float64, NaN onde a
+# planilha está vazia). Operações entre Ceasas viram reduções por eixo
+# em vez de laços pelas colunas (ceasa, métrica) do multi-index.
+class QuestionMatrix:
+    def __init__(self, df):
+        self.ceasas = ceasas_da_planilha(df)
+        self.n_questions = len(df)
+        self.dimensao = _coluna_ids(df, COL_DIMENSAO)
+        self.subdimensao = _coluna_ids(df, COL_SUBDIMENSAO)
+        self.values = {}
+        # Ceasas cujo bloco tem a coluna da métrica
+        self.present = {}
+        for metrica in METRICAS:
+            presente = np.array([(c, metrica) in df.columns for c in self.ceasas], dtype=bool)
+            if not presente.any():
+                continue
+            posicoes = [df.columns.get_loc((c, metrica)) for c, p in zip(self.ceasas, presente) if p]
+            bloco = df.iloc[:, posicoes]
+            if not all(pd.api.types.is_numeric_dtype(t) for t in bloco.dtypes):
+                bloco = bloco.apply(pd.to_numeric, errors='coerce')
+            matriz = np.full((self.n_questions, len(self.ceasas)), np.nan)
+            matriz[:, presente] = bloco.to_numpy(dtype=np.float64, na_value=np.nan)
+            self.values[metrica] = matriz
+            self.present[metrica] = presente
+
+    # Soma da métrica por Ceasa (vazios contam 0)
+    def totals(self, metrica=PONTOS):
+        matriz = self.values.get(metrica)
+        if matriz is None:
+            return pd.Series(dtype='float64')
+        return pd.Series(np.nansum(matriz, axis=0), index=self.ceasas)
+
+    # Soma da métrica só dos Ceasas cujo bloco tem a coluna, na ordem da
+    # planilha (comparativo entre Ceasas)
+    def present_totals(self, metrica=PONTOS):
+        if metrica not in self.present:
+            return pd.Series(dtype='float64')
+        return self.totals(metrica)[self.present[metrica]]
+
+    # Tabela longa (question_id, dimensao, subdimensao, ceasa, metric, value),
+    # só com os valores preenchidos. question_id é a posição da pergunta
+    # na planilha (o Nº se repete).
+    def long(self):
+        n = self.n_questions
+        partes = []
+        for metrica, matriz in self.values.items():
+            k = len(self.ceasas)
+            valores = matriz.T.ravel()
+            preenchido = ~np.isnan(valores)
+            ids = np.tile(np.arange(n), k)[preenchido]
+            partes.append(pd.DataFrame({
+                'question_id': ids,
+                'dimensao': self.dimensao.to_numpy()[ids],
+                'subdimensao': self.subdimensao.to_numpy()[ids],
+                'ceasa': np.repeat(np.array(self.ceasas, dtype=object), n)[preenchido],
+                'metric': metrica,
+                'value': valores[preenchido],
+            }))
+        if not partes:
+            return pd.DataFrame(columns=['question_id', 'dimensao', 'subdimensao', 'ceasa', 'metric', 'value'])
+        longa = pd.concat(partes, ignore_index=True)
+        for col in ['dimensao', 'subdimensao', 'ceasa', 'metric']:
+            longa[col] = longa[col].astype('category')
+        return longa
+
+
+# Atalho: tabela longa direto do frame largo
+def long_table(df):
+    return QuestionMatrix(df).long()
@@ -0,0 +1,126 @@
+# Spans de tempo por etapa de cada rerun dos dashboards.
+#
+# Cada rerun cria um Tracer; as etapas são medidas com `span('nome')` e,
+# ao final, os spans são acrescentados como linhas JSON em TRACE_LOG.
+# Percentis por etapa a partir do log:
+#
+#   python -m tracing [arquivo.jsonl]
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Arquivo de log dos spans ('' desliga a gravação)
+TRACE_LOG = os.environ.get('DASH_TRACE_LOG', '.traces/spans.jsonl')
+
+_local = threading.local()
+_log_lock = threading.Lock()
+
+
+class Tracer:
+    def __init__(self, page, session=None):
+        self.page = page
+        self.session = session
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self.spans = []
+
+    @contextmanager
+    def span(self, name):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append({'stage': name, 'ms': (time.perf_counter() - inicio) * 1000})
+
+    def total_ms(self):
+        return (time.perf_counter() - self._t0) * 1000
+
+    # Tempo somado por etapa neste rerun (uma etapa pode ter vários spans)
+    def by_stage(self):
+        tempos = {}
+        for item in self.spans:
+            tempos[item['stage']] = tempos.get(item['stage'], 0) + item['ms']
+        tempos['total'] = self.total_ms()
+        return tempos
+
+    # Acrescenta os spans do rerun ao log JSONL
+    def flush(self, path=None):
+        path = TRACE_LOG if path is None else path
+        if not path or not self.spans:
+            return
+        linhas = [
+            json.dumps({'ts': self.started, 'session': self.session, 'page': self.page, 'stage': stage, 'ms': ms},
+                       ensure_ascii=False)
+            for stage, ms in self.by_stage().items()
+        ]
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            with _log_lock, open(path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(linhas) + '\n')
+        except OSError:
+            pass
+
+
+# Tracer do rerun atual (cada sessão do Streamlit roda em sua thread)
+def start(page, session=None):
+    _local.tracer = Tracer(page, session)
+    return _local.tracer
+
+
+def current():
+    return getattr(_local, 'tracer', None)
+
+
+def stop():
+    tracer = current()
+    _local.tracer = None
+    if tracer is not None:
+        tracer.flush()
+    return tracer
+
+
+# Mede uma etapa no tracer atual; sem tracer ativo não faz nada
+@contextmanager
+def span(name):
+    tracer = current()
+    if tracer is None:
+        yield
+        return
+    with tracer.span(name):
+        yield
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    if not valores:
+        return float('nan')
+    k = (len(valores) - 1) * p / 100
+    baixo = int(k)
+    alto = min(baixo + 1, len(valores) - 1)
+    return valores[baixo] + (valores[alto] - valores[baixo]) * (k - baixo)
+
+
+# p50/p99 por (página, etapa) a partir do log
+def resumo(path=None):
+    path = path or TRACE_LOG
+    tempos = {}
+    with open(path, encoding='utf-8') as f:
+        for linha in f:
+            try:
+                span = json.loads(linha)
+            except ValueError:
+                continue
+            tempos.setdefault((span.get('page'), span['stage']), []).append(span['ms'])
+    return {
+        chave: {'n': len(v), 'p50_ms': percentil(v, 50), 'p99_ms': percentil(v, 99)}
+        for chave, v in sorted(tempos.items(), key=lambda item: (str(item[0][0]), item[0][1]))
+    }
+
+
+if __name__ == '__main__':
+    for (page, stage), r in resumo(sys.argv[1] if len(sys.argv) > 1 else None).items():
+        print(f"{page!s:<20} {stage:<16} n={r['n']:<6} p50={r['p50_ms']:9.2f} ms  p99={r['p99_ms']:9.2f} ms")
@@ -0,0 +1,660 @@
+import os
+from contextlib import contextmanager
+
+import plotly.graph_objects as go
+import streamlit as st
+import pandas as pd
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import tracing
+from assets import LOGO_WIDTH, static_url, theme_links
+from config import (
+    CEASAS, COLOR_LIST, COLOR_MUTED, COLS_ID, COL_DIMENSAO, COL_NUMERO, COL_PERGUNTA, COL_SUBDIMENSAO, DATA_DIR,
+    GLOBAL_FILE, GLOBAL_SOURCE, PONTOS, SOMA_PTS, TOP_CEASAS, data_path, slug,
+)
+from cube import build_cube, chart_data, kpis, ranking
+from export import FORMATS, export, write
+from dataplane import load_shared
+from figcache import FigureCache, figure_key
+from filters import FilterIndex, select
+from history import HistoryStore
+from ingest import ordem_ceasas
+from loader import DataStore
+from scoring import mismatches
+from sqlstore import BACKEND, SqlStores
+from table import PAGE_SIZE, PAGE_SIZES, TableIndex, column_label
+from tidy import QuestionMatrix
+from tracing import span
+from warmup import report as relatorio_partida
+
+# Tema: CSS, fontes e logo são arquivos de static/ servidos pelo próprio
+# Streamlit (cache do navegador); cada rerun só envia as tags
+THEME_LINK = theme_links()
+LOGO_HTML = f'<img src="{static_url("logo.png")}" width="{LOGO_WIDTH}" alt="Logo">'
+
+KPI_CARD = '<div class="kpi-card"><div class="kpi-label">{label}</div><div class="kpi-value">{value}</div></div>'
+
+
+# Uma única cópia de cada planilha, compartilhada (somente leitura) por
+# todas as sessões e páginas, e mapeada do mesmo arquivo por todos os
+# processos do servidor (dataplane.py)
+@st.cache_resource
+def data_store():
+    return DataStore(loader=load_shared)
+
+
+# Bancos SQL embutidos por fonte (DASH_BACKEND=duckdb ou sqlite); no
+# padrão (pandas) fica None e as páginas usam o DataStore
+@st.cache_resource
+def sql_stores():
+    return SqlStores() if BACKEND != 'pandas' else None
+
+
+# Cache de gráficos do processo (chave: Ceasa, filtros e versão dos dados)
+@st.cache_resource
+def figure_cache():
+    return FigureCache()
+
+
+# Mede as etapas de um fragmento. No rerun completo o tracer da página já
+# está ativo; quando só o fragmento roda, abre um tracer próprio.
+@contextmanager
+def trace_fragment(page):
+    if tracing.current() is not None:
+        yield
+        return
+    tracing.start(page, _session_id())
+    try:
+        yield
+    finally:
+        tracing.stop()
+
+
+# Botão para atualizar os dados. Roda como fragmento: o clique não refaz a
+# página; só há rerun completo quando a planilha mudou de fato.
+@st.fragment
+def botao_atualizar(path):
+    if st.button('Atualizar Dados'):
+        store = sql_stores() or data_store()
+        versao = store.version(path)
+        store.refresh(path, wait=True)
+        if store.version(path) != versao:
+            st.rerun()
+        erro = store.reload_error(path)
+        if erro:
+            st.warning(f'Não foi possível carregar a versão nova da planilha ({erro}). '
+                       'Os dados exibidos são da versão anterior.')
+        else:
+            st.toast('Os dados já estão atualizados.')
+
+
+# KPIs em cards customizados
+def kpi_cards(cards):
+    html = ''.join(KPI_CARD.format(label=label, value=value) for label, value in cards)
+    st.markdown(f'<div class="kpi-row">{html}</div>', unsafe_allow_html=True)
+
+
+# Filtros (Dimensão/Subdimensão), dentro do fragmento do Ceasa
+def filtros(indice, ceasa):
+    col1, col2 = st.columns(2)
+    filtro_dim = col1.multiselect('Dimensão', indice.values(COL_DIMENSAO), default=[], key=f'filtro_dim_{ceasa}')
+    filtro_subdim = col2.multiselect('Subdimensão', indice.values(COL_SUBDIMENSAO), default=[],
+                                     key=f'filtro_subdim_{ceasa}')
+    return filtro_dim, filtro_subdim
+
+
+# Seletor de Ceasa ligado ao parâmetro ?ceasa= da URL. A lista é a de
+# ceasas_disponiveis(); o seletor filtra as opções pelo texto digitado.
+def selecionar_ceasa(ceasa):
+    opcoes = [''] + ceasas_disponiveis()
+    index = opcoes.index(ceasa) if ceasa in opcoes else 0
+    escolha = st.sidebar.selectbox('Ceasa', opcoes, index=index)
+    if escolha != (ceasa or ''):
+        if escolha:
+            st.query_params['ceasa'] = escolha
+        else:
+            st.query_params.pop('ceasa', None)
+        st.rerun()
+
+
+# Rótulo de cada agrupamento do gráfico de pontuação
+GRUPOS_GRAFICO = {'subdimensao': 'Subdimensão', 'dimensao': 'Dimensão'}
+
+
+# Gráfico 'Soma dos Pontos por Subdimensão' (ou por Dimensão): recebe uma
+# linha por barra (cube.chart_data) e desenha um único trace, com a cor de
+# cada barra; a Dimensão e o número de perguntas vão no hover.
+def fig_subdimensao(dados_graf, ceasa, por='subdimensao'):
+    rotulo = GRUPOS_GRAFICO[por]
+    hover = f'<b>%{{x}}</b><br>{SOMA_PTS}: %{{y}}<br>'
+    if por == 'subdimensao':
+        hover += 'Dimensão: %{customdata[0]}<br>'
+    hover += 'Perguntas: %{customdata[1]}<extra></extra>'
+    fig = go.Figure(go.Bar(
+        x=dados_graf['grupo'].astype(str).tolist(),
+        y=dados_graf['soma'].tolist(),
+        marker_color=[COLOR_LIST[i % len(COLOR_LIST)] for i in range(len(dados_graf))],
+        customdata=list(zip(dados_graf['dimensao'].astype(str), dados_graf['perguntas'].tolist())),
+        hovertemplate=hover,
+    ))
+    fig.update_layout(
+        title=f'Soma dos Pontos por {rotulo} - {ceasa}',
+        xaxis_title=rotulo,
+        yaxis_title=SOMA_PTS,
+        showlegend=False,
+        height=500,
+    )
+    return fig
+
+
+# Gráfico 'Soma dos Pontos por Ceasa': as `n` maiores somas e os Ceasas de
+# `fixos` em um único trace, em ordem decrescente; os demais Ceasas ficam
+# na barra 'Outros'. O tamanho do gráfico não cresce com o número de Ceasas.
+def fig_comparativo(somas, n=TOP_CEASAS, fixos=()):
+    barras, outros = ranking(somas, n, fixos)
+    cores = [COLOR_MUTED if nome == outros else COLOR_LIST[i % len(COLOR_LIST)]
+             for i, nome in enumerate(barras.index)]
+    fig = go.Figure(go.Bar(
+        x=[str(nome) for nome in barras.index],
+        y=barras.tolist(),
+        marker_color=cores,
+        hovertemplate='<b>%{x}</b><br>Soma dos Pontos: %{y}<extra></extra>',
+    ))
+    fig.update_layout(
+        title='Soma dos Pontos por Ceasa',
+        xaxis_title='Ceasa',
+        yaxis_title='Soma dos Pontos',
+        showlegend=False,
+        height=500,
+    )
+    return fig
+
+
+# Chave do gráfico do comparativo (a mesma no rerun e no aquecimento)
+def chave_comparativo(versao, n=TOP_CEASAS, fixos=()):
+    return figure_key('comparativo', None, {'top': [n], 'fixos': fixos}, versao)
+
+
+# Cubo de agregados da versão dos dados, montado a partir da matriz
+# pergunta × Ceasa (compartilhada com o comparativo)
+def cubo(dados):
+    return dados.derived('cube', lambda df: build_cube(df, dados.derived('matriz', QuestionMatrix)))
+
+
+# Histórico das rodadas (somente leitura; gravado por `python -m history`)
+@st.cache_resource
+def history_store():
+    return HistoryStore()
+
+
+# Gráficos de evolução do Ceasa nas rodadas registradas. O plotly.express
+# só é importado quando há histórico (o graph_objects já vem com o streamlit).
+def fig_evolucao(total, ceasa):
+    import plotly.express as px
+    dados = pd.DataFrame({'Rodada': total['round'].astype(str), 'Resultado da Matriz': total['resultado']})
+    fig = px.line(dados, x='Rodada', y='Resultado da Matriz', markers=True,
+                  title=f'Resultado da Matriz por Rodada - {ceasa}', color_discrete_sequence=COLOR_LIST)
+    fig.update_yaxes(tickformat='.0%')
+    return fig
+
+
+def fig_evolucao_subdim(subdim, ceasa):
+    import plotly.express as px
+    dados = pd.DataFrame({
+        'Rodada': subdim['round'].astype(str),
+        'Subdimensão': subdim['subdimensao'],
+        '% da Subdimensão': subdim['pct_subdim'],
+    })
+    fig = px.line(dados, x='Rodada', y='% da Subdimensão', color='Subdimensão', markers=True,
+                  title=f'% da Subdimensão por Rodada - {ceasa}', color_discrete_sequence=COLOR_LIST)
+    fig.update_yaxes(tickformat='.0%')
+    return fig
+
+
+# Evolução por rodada, a partir dos resumos pré-agregados do histórico.
+# Só aparece quando há ao menos duas rodadas do Ceasa.
+def render_evolucao(ceasa, filtro_dim, filtro_subdim):
+    store = history_store()
+    total, subdim = store.trend(ceasa)
+    if len(total) < 2:
+        return
+    st.markdown('#### Evolução por Rodada')
+    versao = store.version()
+    fig = figure_cache().get_or_build(figure_key('evolucao', ceasa, {}, versao), lambda: fig_evolucao(total, ceasa))
+    st.plotly_chart(fig, use_container_width=True)
+    if filtro_dim:
+        subdim = subdim[subdim['dimensao'].isin(filtro_dim)]
+    if filtro_subdim:
+        subdim = subdim[subdim['subdimensao'].isin(filtro_subdim)]
+    chave = figure_key('evolucao_subdim', ceasa, {'dim': filtro_dim, 'subdim': filtro_subdim}, versao)
+    fig = figure_cache().get_or_build(chave, lambda: fig_evolucao_subdim(subdim, ceasa))
+    st.plotly_chart(fig, use_container_width=True)
+
+
+# Células da planilha que divergem do recálculo a partir dos Pontos
+# (ex.: fórmula com constante digitada à mão)
+def divergencias(dados, ceasa):
+    tabela = dados.derived('divergencias', lambda df: mismatches(df, dados.derived('matriz', QuestionMatrix)))
+    tabela_divergencias(tabela[tabela['ceasa'] == ceasa])
+
+
+def tabela_divergencias(tabela):
+    if tabela.empty:
+        return
+    with st.expander(f'{len(tabela)} célula(s) da planilha divergem do recálculo a partir dos Pontos'):
+        st.dataframe(
+            tabela.rename(columns={'dimensao': 'Dimensão', 'subdimensao': 'Subdimensão', 'metrica': 'Métrica',
+                                   'planilha': 'Planilha', 'recalculado': 'Recalculado'})
+            [['Dimensão', 'Subdimensão', 'Métrica', 'Planilha', 'Recalculado']],
+            hide_index=True, use_container_width=True,
+        )
+
+
+# KPIs em cards (mesmo dicionário de cube.kpis)
+def cards_ceasa(k):
+    kpi_cards([
+        ('Total de Perguntas', f"{k['total_perguntas']}"),
+        ('Soma dos Pontos', f"{k['soma_pontos']:.0f}"),
+        ('Média % Subdimensão', f"{k['media_subdim']:.2%}"),
+        ('Média % Dimensão', f"{k['media_dim']:.2%}"),
+        ('Média Resultado Matriz', f"{k['media_result']:.2%}"),
+    ])
+
+
+# Gráfico por Subdimensão (ou Dimensão) usando a coluna 'Soma (pts)'.
+# `dados_grafico(por)` agrega os dados só quando o gráfico não está no
+# cache; `detalhe(filtro_dim, filtro_subdim)` busca as perguntas das barras
+# clicadas, só depois do clique.
+def grafico_subdimensao(ceasa, filtro_dim, filtro_subdim, versao, dados_grafico, detalhe):
+    por = 'dimensao' if st.toggle('Agrupar por Dimensão', key=f'agrupar_dim_{ceasa}') else 'subdimensao'
+    chave = figure_key(por, ceasa, {'dim': filtro_dim, 'subdim': filtro_subdim}, versao)
+    with span('figure_build'):
+        fig = figure_cache().get_or_build(chave, lambda: fig_subdimensao(dados_grafico(por), ceasa, por))
+    with span('figure_send'):
+        # A chave muda com os filtros: a seleção não sobrevive a outro gráfico
+        evento = st.plotly_chart(fig, use_container_width=True, on_select='rerun', selection_mode='points',
+                                 key='grafico_' + '|'.join(map(str, chave)))
+    grupos = list(dict.fromkeys(ponto['x'] for ponto in evento.selection.points))
+    if grupos:
+        with span('chart_detail'):
+            st.caption(f'Perguntas de {", ".join(grupos)}')
+            filtros_detalhe = (filtro_dim, grupos) if por == 'subdimensao' else (grupos, filtro_subdim)
+            st.dataframe(detalhe(*filtros_detalhe), hide_index=True, use_container_width=True)
+
+
+# KPIs, gráfico e tabela detalhada de um Ceasa
+def render_ceasa(dados, linhas, ceasa, filtro_dim, filtro_subdim):
+    df = dados.df
+    with span('cube'):
+        cube = cubo(dados)
+    col_soma_pts = (ceasa, SOMA_PTS)
+
+    # KPIs a partir do cubo de agregados
+    with span('kpi'):
+        cards_ceasa(kpis(cube, ceasa, filtro_dim, filtro_subdim))
+
+    st.markdown('#### Pontuação por Subdimensão')
+    if COL_SUBDIMENSAO in df.columns and col_soma_pts in df.columns:
+        indice = dados.derived('filtros', FilterIndex)
+        cols_detalhe = [COL_NUMERO, COL_PERGUNTA] + [c for c in [(ceasa, PONTOS), col_soma_pts] if c in df.columns]
+        grafico_subdimensao(
+            ceasa, filtro_dim, filtro_subdim, dados.sha256,
+            lambda por: chart_data(cube, ceasa, filtro_dim, filtro_subdim, por),
+            lambda fd, fs: select(df, indice.positions({COL_DIMENSAO: fd, COL_SUBDIMENSAO: fs}), cols_detalhe))
+
+    with span('history'):
+        render_evolucao(ceasa, filtro_dim, filtro_subdim)
+
+    with span('scoring'):
+        divergencias(dados, ceasa)
+
+    # Tabela detalhada: perguntas e todas as colunas do Ceasa
+    st.markdown('### Tabela Detalhada')
+    cols_ceasa = [col for col in df.columns if col[0] == ceasa]
+    cols_tabela = COLS_ID + cols_ceasa
+    with span('table'):
+        tabela_detalhada(dados, linhas, cols_tabela, ceasa)
+
+
+# Perguntas das barras clicadas no gráfico, consultadas no banco
+def _detalhe_sql(banco, ceasa, filtro_dim, filtro_subdim):
+    linhas = banco.table_rows(ceasa, filtro_dim, filtro_subdim)
+    return linhas[[c for c in [COL_NUMERO, COL_PERGUNTA, (ceasa, PONTOS), (ceasa, SOMA_PTS)] if c in linhas.columns]]
+
+
+# Mesmas seções de render_ceasa com o backend SQL: cada uma é uma consulta
+# ao banco, que devolve só o resultado (agregados ou a página da tabela)
+def render_ceasa_sql(banco, ceasa, filtro_dim, filtro_subdim):
+    with span('kpi'):
+        cards_ceasa(banco.kpis(ceasa, filtro_dim, filtro_subdim))
+
+    st.markdown('#### Pontuação por Subdimensão')
+    if SOMA_PTS in banco.metrics(ceasa):
+        grafico_subdimensao(
+            ceasa, filtro_dim, filtro_subdim, banco.sha256,
+            lambda por: banco.chart_data(ceasa, filtro_dim, filtro_subdim, por),
+            lambda fd, fs: _detalhe_sql(banco, ceasa, fd, fs))
+
+    with span('history'):
+        render_evolucao(ceasa, filtro_dim, filtro_subdim)
+
+    with span('scoring'):
+        tabela_divergencias(banco.mismatches(ceasa))
+
+    st.markdown('### Tabela Detalhada')
+    with span('table'):
+        total = banco.count(filtro_dim, filtro_subdim)
+        if total <= PAGE_SIZE:
+            st.dataframe(banco.table_page(ceasa, filtro_dim, filtro_subdim, 1, PAGE_SIZE), use_container_width=True)
+        else:
+            _tabela_paginada(ceasa, lambda: _pagina_tabela_sql(banco, ceasa, filtro_dim, filtro_subdim, total))
+        botoes_exportar(lambda fmt: write(banco.table_rows(ceasa, filtro_dim, filtro_subdim), fmt), ceasa)
+
+
+# Tabela Detalhada. Até PAGE_SIZE linhas vai inteira; acima disso é
+# paginada no servidor (ordenação e página escolhidas aqui), e só as
+# linhas da página visível são enviadas ao navegador.
+def tabela_detalhada(dados, linhas, cols_tabela, ceasa):
+    df = dados.df
+    total = len(df) if linhas is None else len(linhas)
+    if total <= PAGE_SIZE:
+        st.dataframe(select(df, linhas, cols_tabela), use_container_width=True)
+    else:
+        _tabela_paginada(ceasa, lambda: _pagina_tabela(dados, linhas, cols_tabela, ceasa, total))
+    botoes_exportar(lambda fmt: export(df, linhas, cols_tabela, fmt), ceasa)
+
+
+# Download da tabela filtrada (todas as páginas). O arquivo só é gerado no
+# clique, fora do rerun, e o clique não refaz a página.
+def botoes_exportar(gerar, ceasa):
+    colunas = st.columns(len(FORMATS) + 3)
+    for coluna, (fmt, (nome, mime)) in zip(colunas, FORMATS.items()):
+        coluna.download_button(
+            f'Baixar {nome}',
+            data=lambda fmt=fmt: gerar(fmt),
+            file_name=f'tabela_{slug(ceasa)}.{fmt}',
+            mime=mime,
+            key=f'exportar_{fmt}_{ceasa}',
+            on_click='ignore',
+        )
+
+
+# Ordenação e página da tabela mudam só este fragmento
+@st.fragment
+def _tabela_paginada(ceasa, pagina):
+    with trace_fragment(f'{ceasa}#tabela'):
+        pagina()
+
+
+# Controles da tabela paginada: (coluna de ordenação, crescente, linhas por
+# página, página)
+def _controles_tabela(cols_tabela, ceasa, total):
+    rotulos = {column_label(c): c for c in cols_tabela}
+    col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
+    ordem = col1.selectbox('Ordenar por', ['Ordem da planilha'] + list(rotulos), key=f'ordem_{ceasa}')
+    decrescente = col2.toggle('Decrescente', key=f'desc_{ceasa}')
+    tamanho = col3.selectbox('Linhas por página', PAGE_SIZES,
+                             index=PAGE_SIZES.index(PAGE_SIZE),
+                             key=f'tamanho_{ceasa}')
+    n_paginas = max(1, -(-total // tamanho))
+    pagina = col4.number_input('Página', min_value=1, max_value=n_paginas, value=1, step=1, key=f'pagina_{ceasa}')
+    return rotulos.get(ordem), not decrescente, tamanho, min(int(pagina), n_paginas)
+
+
+def _legenda_pagina(pagina, tamanho, n_linhas, total):
+    n_paginas = max(1, -(-total // tamanho))
+    inicio = (pagina - 1) * tamanho
+    st.caption(f'Linhas {inicio + 1}–{inicio + n_linhas} de {total} · página {pagina} de {n_paginas}')
+
+
+def _pagina_tabela(dados, linhas, cols_tabela, ceasa, total):
+    df = dados.df
+    tabela = dados.derived('tabela', TableIndex)
+    ordem, crescente, tamanho, pagina = _controles_tabela([c for c in cols_tabela if c in df.columns], ceasa, total)
+    posicoes, pagina, _ = tabela.page(linhas, pagina, tamanho, ordem, crescente)
+    st.dataframe(select(df, posicoes, cols_tabela), use_container_width=True)
+    _legenda_pagina(pagina, tamanho, len(posicoes), total)
+
+
+def _pagina_tabela_sql(banco, ceasa, filtro_dim, filtro_subdim, total):
+    ordem, crescente, tamanho, pagina = _controles_tabela(banco.table_columns(ceasa), ceasa, total)
+    frame = banco.table_page(ceasa, filtro_dim, filtro_subdim, pagina, tamanho, ordem, crescente)
+    st.dataframe(frame, use_container_width=True)
+    _legenda_pagina(pagina, tamanho, len(frame), total)
+
+
+# Soma dos pontos de cada Ceasa da planilha (nível 0 das colunas) em uma
+# redução da matriz; Ceasas sem a coluna Pontos ficam de fora
+def somas_pontos(dados):
+    return dados.derived('matriz', QuestionMatrix).present_totals(PONTOS)
+
+
+# Mesmas somas com o backend SQL: um GROUP BY no banco
+def somas_pontos_sql(banco):
+    return banco.totals(PONTOS, banco.ceasas(PONTOS))
+
+
+# Visão padrão: comparativo entre todos os Ceasas da planilha consolidada
+def render_comparativo(dados):
+    with span('kpi'):
+        somas = somas_pontos(dados)
+    comparativo(somas, len(dados.df), dados.sha256)
+
+
+def render_comparativo_sql(banco):
+    with span('kpi'):
+        somas = somas_pontos_sql(banco)
+        total_perguntas = banco.count()
+    comparativo(somas, total_perguntas, banco.sha256)
+
+
+# Ranking completo, em ordem decrescente (a tabela só envia as linhas
+# visíveis ao navegador)
+def tabela_ranking(somas):
+    ordenado = somas.sort_values(ascending=False, kind='stable')
+    st.dataframe(
+        pd.DataFrame({'Posição': range(1, len(ordenado) + 1), 'Ceasa': ordenado.index,
+                      'Soma dos Pontos': ordenado.to_numpy()}),
+        hide_index=True, use_container_width=True,
+    )
+
+
+def comparativo(somas, total_perguntas, versao):
+    st.markdown('### Comparativo entre Ceasas')
+    if not somas.empty:
+        n, fixos = TOP_CEASAS, []
+        muitos = len(somas) > TOP_CEASAS
+        if muitos:
+            # Mais Ceasas que barras: a busca acrescenta Ceasas ao ranking
+            col1, col2 = st.columns([3, 1])
+            fixos = col1.multiselect('Buscar Ceasas', list(somas.index), key='comparativo_busca',
+                                     placeholder='Digite o nome de um Ceasa')
+            n = int(col2.number_input('Ceasas no gráfico', min_value=1, max_value=len(somas), value=TOP_CEASAS,
+                                      key='comparativo_top'))
+        chave = chave_comparativo(versao, n, fixos)
+        with span('figure_build'):
+            fig = figure_cache().get_or_build(chave, lambda: fig_comparativo(somas, n, fixos))
+        with span('figure_send'):
+            st.plotly_chart(fig, use_container_width=True)
+        if muitos:
+            with st.expander(f'Todos os Ceasas ({len(somas)})'):
+                tabela_ranking(somas)
+    # KPIs globais
+    with span('kpi'):
+        soma_total = somas.sum()
+        kpi_cards([
+            ('Total de Perguntas', f'{total_perguntas}'),
+            ('Soma Total dos Pontos', f'{soma_total:.0f}'),
+        ])
+    st.info('Selecione um Ceasa para visualizar os detalhes.')
+
+
+# Painel de desempenho (oculto; aparece com ?perf=1 na URL)
+def painel_desempenho(tracer):
+    with st.sidebar.expander('Desempenho', expanded=True):
+        tempos = tracer.by_stage()
+        st.dataframe(
+            pd.DataFrame({'Etapa': list(tempos), 'ms': [round(v, 1) for v in tempos.values()]}),
+            hide_index=True, use_container_width=True,
+        )
+        cache = figure_cache().stats()
+        st.caption(f"Cache de gráficos: {cache['hits']} acertos, {cache['misses']} faltas, "
+                   f"{cache['coalesced']} coalescidas, {cache['bytes'] / 1024:.0f} KiB")
+        # Single-flight: execuções reais x sessões que esperaram a de outra
+        voos = (sql_stores() or data_store()).flights.stats()
+        for kind, nome in (('load', 'Cargas'), ('read', 'Leituras da planilha'), ('derived', 'Derivados')):
+            if kind in voos:
+                st.caption(f"{nome}: {voos[kind]['leaders']} execuções, {voos[kind]['coalesced']} chamadas coalescidas")
+        partida = relatorio_partida()
+        if partida:
+            # Só com `python -m warmup`: tempo de cada etapa da partida
+            pronto = f"servidor pronto em {partida['server_ready']:.0f} ms, " if 'server_ready' in partida else ''
+            st.caption(f"Partida: {pronto}aquecimento concluído em {partida['warm_done']:.0f} ms")
+            st.dataframe(
+                pd.DataFrame({'Etapa': [k for k, v in partida.items() if isinstance(v, float)],
+                              'ms': [round(v, 1) for v in partida.values() if isinstance(v, float)]}),
+                hide_index=True, use_container_width=True,
+            )
+        for path, mem in data_store().memory().items():
+            st.caption(f"{os.path.basename(path) or path}: {mem['bytes_before'] / 1024:.0f} KiB → "
+                       f"{mem['bytes_after'] / 1024:.0f} KiB, {mem['columns_after']} de {mem['columns_before']} colunas")
+
+
+def _session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
+
+
+# Página completa. Sem `ceasa` a página segue o parâmetro ?ceasa= da URL
+# (app multi-Ceasa); com `ceasa` fixo serve um único Ceasa.
+def render_page(ceasa=None):
+    navegavel = ceasa is None
+    if navegavel:
+        ceasa = st.query_params.get('ceasa')
+    if ceasa and ceasa not in CEASAS and ceasa not in ceasas_disponiveis():
+        aviso = f'Ceasa "{ceasa}" não encontrado.'
+        ceasa = None
+    else:
+        aviso = None
+
+    titulo = f'Dashboard Avaliativo - {ceasa}' if ceasa else 'Dashboard Avaliativo'
+    st.set_page_config(page_title=titulo, layout='wide', page_icon='📊')
+    tracer = tracing.start(ceasa or 'comparativo', _session_id())
+    try:
+        _render_conteudo(ceasa, titulo, navegavel, aviso)
+        if st.query_params.get('perf'):
+            painel_desempenho(tracer)
+    finally:
+        tracing.stop()
+
+
+# Fonte de dados de uma página. Ceasas sem planilha cadastrada em CEASAS
+# (e a página sem Ceasa) usam a fonte do comparativo.
+def fonte(ceasa=None):
+    if ceasa in CEASAS:
+        return data_path(CEASAS[ceasa])
+    return str(DATA_DIR) if GLOBAL_SOURCE == 'merge' else data_path(GLOBAL_FILE)
+
+
+# Ceasas atendidos: os cadastrados em CEASAS e os que aparecem no nível 0
+# das colunas da fonte do comparativo (um Ceasa novo entra sem cadastro)
+def ceasas_disponiveis():
+    if sql_stores() is not None:
+        nomes = sql_stores().get(fonte()).ceasas()
+    else:
+        nomes = data_store().dataset(fonte()).derived('matriz', QuestionMatrix).ceasas
+    return ordem_ceasas(set(CEASAS) | set(nomes))
+
+
+def _render_conteudo(ceasa, titulo, navegavel, aviso):
+    with span('theme'):
+        st.markdown(THEME_LINK, unsafe_allow_html=True)
+        if ceasa:
+            # Logo no topo
+            st.markdown(LOGO_HTML, unsafe_allow_html=True)
+
+    st.title(titulo if ceasa else 'Dashboard Avaliativo - Ceasas')
+    file_path = fonte(ceasa)
+    if aviso:
+        st.warning(aviso)
+
+    botao_atualizar(file_path)
+    if navegavel:
+        selecionar_ceasa(ceasa)
+
+    if ceasa:
+        painel_ceasa(file_path, ceasa)
+    else:
+        painel_comparativo(file_path)
+
+
+# Comparativo entre Ceasas. Mudar a busca ou o tamanho do ranking refaz só
+# este fragmento.
+@st.fragment
+def painel_comparativo(file_path):
+    with trace_fragment('comparativo#ranking'):
+        if sql_stores() is not None:
+            with span('load_data'):
+                banco = sql_stores().get(file_path)
+            render_comparativo_sql(banco)
+            return
+        with span('load_data'):
+            dados = data_store().dataset(file_path)
+        render_comparativo(dados)
+
+
+# Filtros, KPIs, gráficos e tabela de um Ceasa. Mudar um filtro refaz só
+# este fragmento (configuração da página, tema e título ficam como estão).
+# Os dados são buscados no DataStore a cada execução, para o fragmento
+# sempre usar a versão atual.
+@st.fragment
+def painel_ceasa(file_path, ceasa):
+    with trace_fragment(f'{ceasa}#filtros'):
+        if sql_stores() is not None:
+            with span('load_data'):
+                banco = sql_stores().get(file_path)
+            filtro_dim, filtro_subdim = filtros(banco, ceasa)
+            render_ceasa_sql(banco, ceasa, filtro_dim, filtro_subdim)
+            return
+        with span('load_data'):
+            dados = data_store().dataset(file_path)
+        with span('filter'):
+            indice = dados.derived('filtros', FilterIndex)
+        filtro_dim, filtro_subdim = filtros(indice, ceasa)
+        with span('filter'):
+            linhas = indice.positions({COL_DIMENSAO: filtro_dim, COL_SUBDIMENSAO: filtro_subdim})
+        render_ceasa(dados, linhas, ceasa, filtro_dim, filtro_subdim)
+
+
+# Prepara, sem desenhar nada, a visão padrão (sem filtros) de uma página:
+# carga dos dados, derivados e o gráfico no cache, com as mesmas chaves do
+# rerun. Usado na partida do servidor (warmup.py).
+def aquecer(ceasa=None):
+    file_path = fonte(ceasa)
+    if sql_stores() is not None:
+        banco = sql_stores().get(file_path)
+        if ceasa is None:
+            somas = somas_pontos_sql(banco)
+            figure_cache().get_or_build(chave_comparativo(banco.sha256), lambda: fig_comparativo(somas))
+        else:
+            banco.kpis(ceasa)
+            if SOMA_PTS in banco.metrics(ceasa):
+                figure_cache().get_or_build(figure_key('subdimensao', ceasa, {}, banco.sha256),
+                                            lambda: fig_subdimensao(banco.chart_data(ceasa), ceasa))
+        return
+    dados = data_store().dataset(file_path)
+    df = dados.df
+    matriz = dados.derived('matriz', QuestionMatrix)
+    if ceasa is None:
+        somas = somas_pontos(dados)
+        if not somas.empty:
+            figure_cache().get_or_build(chave_comparativo(dados.sha256), lambda: fig_comparativo(somas))
+        return
+    dados.derived('filtros', FilterIndex)
+    cube = cubo(dados)
+    dados.derived('divergencias', lambda df: mismatches(df, matriz))
+    if len(df) > PAGE_SIZE:
+        dados.derived('tabela', TableIndex)
+    if COL_SUBDIMENSAO in df.columns and (ceasa, SOMA_PTS) in df.columns:
+        figure_cache().get_or_build(figure_key('subdimensao', ceasa, {}, dados.sha256),
+                                    lambda: fig_subdimensao(chart_data(cube, ceasa), ceasa))
@@ -0,0 +1,125 @@
+# Partida do servidor com os caches aquecidos.
+#
+# Em vez de `streamlit run dashboard.py`:
+#
+#   python -m warmup [opções do streamlit run]     # ex.: --server.port 8502
+#
+# O servidor sobe no mesmo processo e, em paralelo, uma thread prepara as
+# visões padrão (comparativo sem filtros e cada Ceasa sem filtros): importa
+# as bibliotecas pesadas, carrega as planilhas, monta os derivados e os
+# gráficos no cache. Quem chega durante o aquecimento espera a mesma carga
+# (single-flight) em vez de repeti-la. O tempo de cada etapa vai para o log
+# de spans (página 'boot') e para o painel ?perf=1.
+import logging
+import sys
+import threading
+import time
+
+import tracing
+from config import CEASAS
+from tracing import span
+
+# Script servido pelo streamlit
+SCRIPT = 'dashboard.py'
+
+# Etapas da partida: {'etapa': ms}, preenchido ao fim do aquecimento
+REPORT = {}
+
+_t0 = time.perf_counter()
+_state = {'thread': None, 'server_ms': None}
+
+
+def _ms():
+    return (time.perf_counter() - _t0) * 1000
+
+
+# Aquece as visões padrão. Uma falha em uma visão não impede as demais
+# (a página correspondente faz a carga normal no primeiro acesso).
+def warm(ceasas=None):
+    # Fora de uma sessão, cada cache do Streamlit avisa que não há contexto
+    # (o nível do logger é redefinido pelo `streamlit run`; o filtro não)
+    logging.getLogger('streamlit.runtime.scriptrunner_utils.script_run_context').addFilter(
+        lambda registro: registro.threadName != 'warmup')
+    tracer = tracing.start('boot')
+    erros = {}
+    try:
+        with span('imports'):
+            import plotly.express  # noqa: F401
+            import openpyxl  # noqa: F401
+
+            import views
+        with span('history'):
+            views.history_store().rollups()
+        for ceasa in [None] + list(CEASAS if ceasas is None else ceasas):
+            nome = ceasa or 'comparativo'
+            with span(f'view:{nome}'):
+                try:
+                    views.aquecer(ceasa)
+                except Exception as exc:
+                    erros[nome] = repr(exc)
+    finally:
+        # stop() grava os spans da partida no log
+        tracing.stop()
+    REPORT.clear()
+    REPORT.update(tracer.by_stage())
+    REPORT['warm_done'] = _ms()
+    if erros:
+        REPORT['errors'] = erros
+    return REPORT
+
+
+# Etapas da partida, com o instante em que o servidor ficou pronto (ms
+# desde o início do processo)
+def report():
+    etapas = dict(REPORT)
+    if _state['server_ms'] is not None:
+        etapas['server_ready'] = _state['server_ms']
+    return etapas
+
+
+# Inicia o aquecimento em segundo plano (uma vez por processo)
+def start_warm(ceasas=None):
+    if _state['thread'] is None:
+        thread = threading.Thread(target=warm, args=(ceasas,), name='warmup', daemon=True)
+        _state['thread'] = thread
+        thread.start()
+    return _state['thread']
+
+
+def done():
+    return _state['thread'] is not None and not _state['thread'].is_alive()
+
+
+def _print_report():
+    _state['thread'].join()
+    linhas = [f'  {etapa:<28} {ms:9.1f} ms' for etapa, ms in report().items() if isinstance(ms, float)]
+    print('Aquecimento concluído:\n' + '\n'.join(linhas), file=sys.stderr)
+    for nome, erro in REPORT.get('errors', {}).items():
+        print(f'  falha em {nome}: {erro}', file=sys.stderr)
+
+
+# Instante em que o servidor passa a aceitar sessões (runtime iniciado)
+def _aguardar_servidor():
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.runtime import RuntimeState
+
+    while not Runtime.exists() or Runtime.instance().state == RuntimeState.INITIAL:
+        time.sleep(0.02)
+    _state['server_ms'] = _ms()
+
+
+def main(argv=None):
+    from streamlit.web import cli
+
+    argv = list(sys.argv[1:] if argv is None else argv)
+    start_warm()
+    threading.Thread(target=_aguardar_servidor, daemon=True).start()
+    threading.Thread(target=_print_report, daemon=True).start()
+    cli.main(['run', SCRIPT] + argv, prog_name='streamlit')
+
+
+if __name__ == '__main__':
+    # Roda pelo módulo importado: o painel ?perf=1 lê o REPORT de `warmup`,
+    # não o de `__main__`
+    import warmup
+    warmup.main()
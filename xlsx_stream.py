@@ -0,0 +1,118 @@
+from array import array
+
+import numpy as np
+import pandas as pd
+
+
+# Buffer tipado de uma coluna: números vão para um array('d') contíguo e a
+# coluna só passa a guardar objetos Python se aparecer um valor não numérico
+class ColumnBuffer:
+    def __init__(self):
+        self.values = array('d')
+        self.objects = None
+        self.all_int = True
+        self.has_missing = False
+
+    def append(self, value):
+        if value is None or value == '':
+            self.has_missing = True
+            value = None
+        elif isinstance(value, float) and value.is_integer():
+            # Mesmo critério do pandas: 2.0 na célula vira 2
+            value = int(value)
+        if self.objects is not None:
+            self.objects.append(value)
+        elif value is None:
+            self.values.append(np.nan)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            if isinstance(value, float):
+                self.all_int = False
+            self.values.append(value)
+        else:
+            self.objects = [None if np.isnan(v) else (int(v) if self.all_int else v) for v in self.values]
+            self.values = None
+            self.objects.append(value)
+
+    def to_array(self):
+        if self.objects is not None:
+            return pd.Series(self.objects)
+        data = np.frombuffer(self.values, dtype='float64') if len(self.values) else np.empty(0)
+        if self.all_int and not self.has_missing and len(data):
+            return data.astype('int64')
+        return data.copy()
+
+
+# Repete o nome do nível superior nas células mescladas do cabeçalho,
+# sem atravessar o limite do nível acima (igual ao read_excel)
+def _fill_header(row, control_row):
+    last = row[0]
+    for i in range(1, len(row)):
+        if not control_row[i]:
+            last = row[i]
+        if row[i] == '' or row[i] is None:
+            row[i] = last
+        else:
+            control_row[i] = False
+            last = row[i]
+    return row
+
+
+# MultiIndex no mesmo formato de pd.read_excel(path, header=[0, 1]),
+# incluindo os nomes 'Unnamed: <col>_level_<nível>' das células vazias
+def resolve_header(header_rows):
+    ncols = max(len(r) for r in header_rows)
+    rows = [list(r) + [None] * (ncols - len(r)) for r in header_rows]
+    control_row = [True] * ncols
+    for level in range(len(rows) - 1):
+        rows[level] = _fill_header(rows[level], control_row)
+    tuples = []
+    for col in range(ncols):
+        names = []
+        for level, row in enumerate(rows):
+            value = row[col]
+            if value is None or value == '':
+                value = f'Unnamed: {col}_level_{level}'
+            names.append(str(value) if not isinstance(value, str) else value)
+        tuples.append(tuple(names))
+    return pd.MultiIndex.from_tuples(tuples)
+
+
+# Posição da última célula preenchida da linha
+def _width(row):
+    for i in range(len(row) - 1, -1, -1):
+        if row[i] is not None and row[i] != '':
+            return i + 1
+    return 0
+
+
+# Leitura em fluxo da primeira planilha: o openpyxl em modo read_only
+# percorre as linhas sem montar o modelo do workbook, e cada valor vai
+# direto para o buffer da sua coluna
+def read_xlsx_stream(path, header_rows=2, sheet=0):
+    # openpyxl só é importado quando uma planilha é lida de fato (com snapshot
+    # ou plano de dados publicado, a carga não precisa dele)
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[sheet] if isinstance(sheet, int) else wb[sheet]
+        rows = ws.iter_rows(values_only=True)
+        header = [next(rows, ()) for _ in range(header_rows)]
+        ncols = max(len(r) for r in header)
+        width = max(_width(r) for r in header)
+        buffers = [ColumnBuffer() for _ in range(ncols)]
+        for row in rows:
+            row_width = _width(row)
+            if not row_width:
+                # Linhas em branco são descartadas, como no read_excel
+                continue
+            width = max(width, row_width)
+            for i in range(ncols):
+                buffers[i].append(row[i] if i < len(row) else None)
+    finally:
+        wb.close()
+    # Colunas vazias à direita (formatação sem dados) também são descartadas
+    columns = resolve_header([r[:width] for r in header])
+    df = pd.DataFrame({i: buffers[i].to_array() for i in range(width)})
+    df.columns = columns
+    return df